@@ -1,165 +1,24 @@
 import sys
-import os
-import json
+import argparse
 import datetime
 from PyQt5 import QtCore, QtGui, QtWidgets
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 
+import metrics
+from charts import AnalysisCharts, chart_inputs
+from dashboard import start_dashboard
+from forecast import DEFAULT_LEAD_TIME
+from memprofile import MemoryProfiler
+from inventory import InventoryManager
+from money import format_cents, from_cents, to_cents
+from product_picker import ProductPicker
+from sales_table import SalesTableModel
+from valuation import ValuationModel
 
-# ---------------------------
-# InventoryManager: Data management class
-# ---------------------------
-class InventoryManager:
-    def __init__(self):
-        self.products = []  # Each product: {name, quantity, price, cost, restock_threshold}
-        self.sales = []  # Each sale: {product, quantity, revenue, profit, day}
-        self.total_revenue = 0.0
-        self.total_profit = 0.0
-        self.data_file = "products.json"
-        self.sales_file = "sales.json"
-        self.time_file = "time.json"
-        self.current_day = 1
-        self.load_time()
-        self.load_products()
-        self.load_sales()
-        self.calculate_totals()
-
-    def load_time(self):
-        if os.path.exists(self.time_file):
-            try:
-                with open(self.time_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.current_day = data.get("current_day", 1)
-            except Exception as e:
-                print("Failed to load time:", e)
-        else:
-            self.current_day = 1
-
-    def save_time(self):
-        try:
-            with open(self.time_file, "w", encoding="utf-8") as f:
-                json.dump({"current_day": self.current_day}, f, ensure_ascii=False, indent=4)
-            print("Time saved!")
-        except Exception as e:
-            print("Failed to save time:", e)
-
-    def advance_day(self):
-        self.current_day += 1
-        self.save_time()
 
-    def load_products(self):
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, "r", encoding="utf-8") as f:
-                    self.products = json.load(f)
-                print("Product data loaded!")
-            except Exception as e:
-                print("Failed to load product data:", e)
-
-    def save_products(self):
-        try:
-            with open(self.data_file, "w", encoding="utf-8") as f:
-                json.dump(self.products, f, ensure_ascii=False, indent=4)
-            print("Product data saved!")
-        except Exception as e:
-            print("Failed to save product data:", e)
-
-    def load_sales(self):
-        if os.path.exists(self.sales_file):
-            try:
-                with open(self.sales_file, "r", encoding="utf-8") as f:
-                    self.sales = json.load(f)
-                print("Sales records loaded!")
-            except Exception as e:
-                print("Failed to load sales records:", e)
-
-    def save_sales(self):
-        try:
-            with open(self.sales_file, "w", encoding="utf-8") as f:
-                json.dump(self.sales, f, ensure_ascii=False, indent=4)
-            print("Sales records saved!")
-        except Exception as e:
-            print("Failed to save sales records:", e)
-
-    def calculate_totals(self):
-        # Recalculate total revenue and profit based on loaded sales
-        self.total_revenue = sum(sale.get("revenue", 0) for sale in self.sales)
-        self.total_profit = sum(sale.get("profit", 0) for sale in self.sales)
-
-    def add_product(self, product):
-        self.products.append(product)
-        self.save_products()
-
-    def edit_product(self, index, new_product):
-        if 0 <= index < len(self.products):
-            old_product = self.products[index]
-            old_name = old_product.get("name", "")
-            self.products[index] = new_product
-            # If the product name has changed, update the product name in all sales records
-            if old_name != new_product.get("name", ""):
-                for sale in self.sales:
-                    if sale.get("product") == old_name:
-                        sale["product"] = new_product.get("name", "")
-                self.save_sales()  # Keep updated sales records
-            self.save_products()
-
-    def record_sale(self, product_index, quantity):
-        if 0 <= product_index < len(self.products):
-            product = self.products[product_index]
-            if quantity > product["quantity"]:
-                return False, "Insufficient stock!"
-            product["quantity"] -= quantity
-            revenue = quantity * product["price"]
-            profit = quantity * (product["price"] - product.get("cost", 0))
-            self.total_revenue += revenue
-            self.total_profit += profit
-            sale_record = {
-                "product": product["name"],
-                "quantity": quantity,
-                "revenue": revenue,
-                "profit": profit,
-                "day": self.current_day
-            }
-            self.sales.append(sale_record)
-            self.save_products()  # Update inventory
-            self.save_sales()  # Persist sales record
-            return True, "Sale recorded successfully!"
-        else:
-            return False, "Invalid product index!"
-
-    def get_sales_summary(self):
-        # Returns a dictionary: product name -> total quantity sold (0 if no sale)
-        summary = {}
-        for product in self.products:
-            summary[product["name"]] = 0
-        for sale in self.sales:
-            name = sale["product"]
-            summary[name] = summary.get(name, 0) + sale["quantity"]
-        return summary
-
-    def get_best_selling(self):
-        summary = self.get_sales_summary()
-        if summary:
-            best_product = max(summary, key=summary.get)
-            return best_product, summary[best_product]
-        return None, 0
-
-    def get_worst_selling(self):
-        summary = self.get_sales_summary()
-        if summary:
-            worst_product = min(summary, key=summary.get)
-            return worst_product, summary[worst_product]
-        return None, 0
-
-    def check_restock(self):
-        # Returns a list of product names that are below threshold
-        alerts = []
-        for product in self.products:
-            threshold = product.get("restock_threshold", 10)
-            if product["quantity"] < threshold:
-                alerts.append(product["name"])
-        return alerts
+ANALYSIS_SECONDS = metrics.histogram("gui_update_analysis_seconds", "Time to refresh the analysis tab")
 
 
 # ---------------------------
@@ -176,6 +35,8 @@ class ProductDialog(QtWidgets.QDialog):
         layout = QtWidgets.QFormLayout(self)
 
         self.edit_name = QtWidgets.QLineEdit()
+        self.edit_sku = QtWidgets.QLineEdit()
+        self.edit_sku.setPlaceholderText("Optional; scan to fill in")
         self.spin_quantity = QtWidgets.QSpinBox()
         self.spin_quantity.setRange(0, 10000)
         self.spin_price = QtWidgets.QDoubleSpinBox()
@@ -186,12 +47,19 @@ class ProductDialog(QtWidgets.QDialog):
         self.spin_cost.setDecimals(2)
         self.spin_restock = QtWidgets.QSpinBox()
         self.spin_restock.setRange(0, 10000)
+        self.spin_lead_time = QtWidgets.QSpinBox()
+        self.spin_lead_time.setRange(1, 365)
+        self.spin_lead_time.setValue(DEFAULT_LEAD_TIME)
+        self.check_auto_restock = QtWidgets.QCheckBox("Use forecast reorder point")
 
         layout.addRow("Name:", self.edit_name)
+        layout.addRow("SKU / Barcode:", self.edit_sku)
         layout.addRow("Quantity:", self.spin_quantity)
         layout.addRow("Price:", self.spin_price)
         layout.addRow("Cost:", self.spin_cost)
         layout.addRow("Restock Threshold:", self.spin_restock)
+        layout.addRow("Lead Time (days):", self.spin_lead_time)
+        layout.addRow("Auto Threshold:", self.check_auto_restock)
 
         btn_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
         btn_box.accepted.connect(self.accept)
@@ -199,19 +67,25 @@ class ProductDialog(QtWidgets.QDialog):
         layout.addRow(btn_box)
 
         if product:
-            self.edit_name.setText(product.get("name", ""))
-            self.spin_quantity.setValue(product.get("quantity", 0))
-            self.spin_price.setValue(product.get("price", 0.0))
-            self.spin_cost.setValue(product.get("cost", 0.0))
-            self.spin_restock.setValue(product.get("restock_threshold", 10))
+            self.edit_name.setText(product["name"])
+            self.edit_sku.setText(product["sku"])
+            self.spin_quantity.setValue(product["quantity"])
+            self.spin_price.setValue(from_cents(product["price_cents"]))
+            self.spin_cost.setValue(from_cents(product["cost_cents"]))
+            self.spin_restock.setValue(product["restock_threshold"])
+            self.spin_lead_time.setValue(product["lead_time"])
+            self.check_auto_restock.setChecked(product["auto_restock"])
 
     def get_product_data(self):
         return {
             "name": self.edit_name.text(),
             "quantity": self.spin_quantity.value(),
-            "price": self.spin_price.value(),
-            "cost": self.spin_cost.value(),
-            "restock_threshold": self.spin_restock.value()
+            "price_cents": to_cents(self.spin_price.value()),
+            "cost_cents": to_cents(self.spin_cost.value()),
+            "restock_threshold": self.spin_restock.value(),
+            "lead_time": self.spin_lead_time.value(),
+            "auto_restock": self.check_auto_restock.isChecked(),
+            "sku": self.edit_sku.text().strip()
         }
 
 
@@ -219,15 +93,21 @@ class ProductDialog(QtWidgets.QDialog):
 # MainWindow: Main GUI window with tabs and time control
 # ---------------------------
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self):
+    def __init__(self, store=None, memory_profiler=None):
         super().__init__()
-        self.setWindowTitle("Inventory and Sales Management System")
+        self.memory_profiler = None  # Set once the window is built, so reports see every part of it
+        title = "Inventory and Sales Management System"
+        self.setWindowTitle(f"{title} - Store: {store}" if store else title)
         self.resize(1800, 1200)  # make the initial window larger
-        self.manager = InventoryManager()
+        self.manager = InventoryManager(store=store)
         self.alerted_products = set()  # To record products alerted in the current day
         self.initUI()
+        self.show_load_errors()
         self.check_alerts_initial()
         self.update_status_bar()
+        if memory_profiler is not None:
+            self.memory_profiler = memory_profiler
+            memory_profiler.report("startup", self.manager, self)
 
     def initUI(self):
         # Create main toolbar on the LEFT side
@@ -240,6 +120,16 @@ class MainWindow(QtWidgets.QMainWindow):
         self.advance_day_action.triggered.connect(self.advance_day)
         self.toolbar.addAction(self.advance_day_action)
 
+        # Undo / Redo of the last product, sale or day changes
+        self.undo_action = QtWidgets.QAction("Undo", self)
+        self.undo_action.setShortcut(QtGui.QKeySequence.Undo)
+        self.undo_action.triggered.connect(self.undo)
+        self.toolbar.addAction(self.undo_action)
+        self.redo_action = QtWidgets.QAction("Redo", self)
+        self.redo_action.setShortcut(QtGui.QKeySequence.Redo)
+        self.redo_action.triggered.connect(self.redo)
+        self.toolbar.addAction(self.redo_action)
+
         # A label to show current day in the toolbar
         self.day_label = QtWidgets.QLabel(f"Day: {self.manager.current_day}")
         self.toolbar.addWidget(self.day_label)
@@ -263,6 +153,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.tabs.addTab(self.tab_analysis, "Sales Analysis")
         self.initAnalysisTab()
 
+    def show_load_errors(self):
+        # Records that failed validation were skipped while loading; tell the user where they are
+        errors = self.manager.load_errors
+        if errors:
+            msg = "Some records could not be loaded and were skipped:\n" + "\n".join(errors[:10])
+            if len(errors) > 10:
+                msg += f"\n... and {len(errors) - 10} more"
+            QtWidgets.QMessageBox.warning(self, "Data Errors", msg)
+
     def update_status_bar(self):
         self.statusBar().showMessage(f"Current Day: {self.manager.current_day}")
 
@@ -273,8 +172,9 @@ class MainWindow(QtWidgets.QMainWindow):
         layout = QtWidgets.QVBoxLayout()
 
         self.table_products = QtWidgets.QTableWidget()
-        self.table_products.setColumnCount(5)
-        self.table_products.setHorizontalHeaderLabels(["Name", "Quantity", "Price", "Cost", "Restock Threshold"])
+        self.table_products.setColumnCount(7)
+        self.table_products.setHorizontalHeaderLabels(
+            ["Name", "Quantity", "Price", "Cost", "Restock Threshold", "Reorder Point", "ABC (Revenue/Profit)"])
         self.table_products.horizontalHeader().setStretchLastSection(True)
         layout.addWidget(self.table_products)
 
@@ -299,19 +199,30 @@ class MainWindow(QtWidgets.QMainWindow):
         products = self.manager.products
         self.table_products.setRowCount(len(products))
         for row, product in enumerate(products):
-            self.table_products.setItem(row, 0, QtWidgets.QTableWidgetItem(product.get("name", "")))
-            self.table_products.setItem(row, 1, QtWidgets.QTableWidgetItem(str(product.get("quantity", 0))))
-            self.table_products.setItem(row, 2, QtWidgets.QTableWidgetItem(str(product.get("price", 0.0))))
-            self.table_products.setItem(row, 3, QtWidgets.QTableWidgetItem(str(product.get("cost", 0.0))))
-            self.table_products.setItem(row, 4, QtWidgets.QTableWidgetItem(str(product.get("restock_threshold", 10))))
+            self.table_products.setItem(row, 0, QtWidgets.QTableWidgetItem(product["name"]))
+            self.table_products.setItem(row, 1, QtWidgets.QTableWidgetItem(str(product["quantity"])))
+            self.table_products.setItem(row, 2, QtWidgets.QTableWidgetItem(format_cents(product["price_cents"])))
+            self.table_products.setItem(row, 3, QtWidgets.QTableWidgetItem(format_cents(product["cost_cents"])))
+            self.table_products.setItem(row, 4, QtWidgets.QTableWidgetItem(str(product["restock_threshold"])))
+            reorder_point = str(self.manager.get_reorder_point(product))
+            if product["auto_restock"]:
+                reorder_point += " (auto)"
+            self.table_products.setItem(row, 5, QtWidgets.QTableWidgetItem(reorder_point))
+            classes = (self.manager.get_pareto_class(product, "revenue") + " / "
+                       + self.manager.get_pareto_class(product, "profit"))
+            self.table_products.setItem(row, 6, QtWidgets.QTableWidgetItem(classes))
 
     def add_product(self):
         dialog = ProductDialog(self)
         if dialog.exec_() == QtWidgets.QDialog.Accepted:
             product = dialog.get_product_data()
-            self.manager.add_product(product)
+            try:
+                self.manager.add_product(product)
+            except ValueError as e:
+                QtWidgets.QMessageBox.warning(self, "Error", str(e))
+                return
             self.load_products_to_table()
-            self.update_product_combo()
+            self.combo_products.product_added()
 
     def edit_product(self):
         selected = self.table_products.selectedItems()
@@ -323,9 +234,15 @@ class MainWindow(QtWidgets.QMainWindow):
         dialog = ProductDialog(self, product)
         if dialog.exec_() == QtWidgets.QDialog.Accepted:
             new_product = dialog.get_product_data()
-            self.manager.edit_product(row, new_product)
+            try:
+                self.manager.edit_product(row, new_product)
+            except ValueError as e:
+                QtWidgets.QMessageBox.warning(self, "Error", str(e))
+                return
             self.load_products_to_table()
-            self.update_product_combo()
+            self.combo_products.product_changed(row)
+            if new_product["name"] != product["name"]:
+                self.load_sales_to_table(rebuild=True)  # Sales records were renamed
 
     # ---------------------------
     # Sales Records Tab
@@ -335,7 +252,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         form_layout = QtWidgets.QFormLayout()
 
-        self.combo_products = QtWidgets.QComboBox()
+        self.combo_products = ProductPicker(self.manager)  # Type to search by name
         self.spin_quantity = QtWidgets.QSpinBox()
         self.spin_quantity.setRange(1, 1000)
 
@@ -348,23 +265,92 @@ class MainWindow(QtWidgets.QMainWindow):
         layout.addWidget(self.btn_record_sale)
         self.btn_record_sale.clicked.connect(self.record_sale)
 
-        self.table_sales = QtWidgets.QTableWidget()
-        self.table_sales.setColumnCount(5)
-        self.table_sales.setHorizontalHeaderLabels(["Product", "Quantity", "Revenue", "Profit", "Day"])
+        # Basket: several lines checked out as one transaction
+        self.basket = []  # (product name, quantity), one line per product
+        self.basket_rows = {}  # Product name -> basket line, so a scan finds its line in O(1)
+        self.basket_amounts = []  # Quoted amount of each line in cents
+        self.basket_total_cents = 0
+        basket_box = QtWidgets.QGroupBox("Basket")
+        basket_layout = QtWidgets.QVBoxLayout()
+        # Keyboard-wedge barcode scanners type the code followed by Enter; each scan adds one unit
+        self.edit_scan = QtWidgets.QLineEdit()
+        self.edit_scan.setPlaceholderText("Scan or type a barcode and press Enter")
+        basket_layout.addWidget(self.edit_scan)
+        self.table_basket = QtWidgets.QTableWidget()
+        self.table_basket.setColumnCount(3)
+        self.table_basket.setHorizontalHeaderLabels(["Product", "Quantity", "Amount"])
+        self.table_basket.horizontalHeader().setStretchLastSection(True)
+        self.table_basket.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table_basket.setMaximumHeight(200)
+        basket_layout.addWidget(self.table_basket)
+        basket_buttons = QtWidgets.QHBoxLayout()
+        self.btn_add_to_basket = QtWidgets.QPushButton("Add to Basket")
+        self.btn_remove_from_basket = QtWidgets.QPushButton("Remove Line")
+        self.btn_checkout = QtWidgets.QPushButton("Checkout")
+        basket_buttons.addWidget(self.btn_add_to_basket)
+        basket_buttons.addWidget(self.btn_remove_from_basket)
+        basket_buttons.addWidget(self.btn_checkout)
+        basket_layout.addLayout(basket_buttons)
+        basket_box.setLayout(basket_layout)
+        layout.addWidget(basket_box)
+        self.btn_add_to_basket.clicked.connect(self.add_to_basket)
+        self.btn_remove_from_basket.clicked.connect(self.remove_from_basket)
+        self.btn_checkout.clicked.connect(self.checkout)
+        self.edit_scan.returnPressed.connect(self.scan_barcode)
+
+        # Filter bar over the sales table; filtering and sorting run on the numpy index in SalesTableModel
+        filter_layout = QtWidgets.QHBoxLayout()
+        self.edit_filter_product = QtWidgets.QLineEdit()
+        self.edit_filter_product.setPlaceholderText("Product contains...")
+        self.spin_filter_from = QtWidgets.QSpinBox()
+        self.spin_filter_to = QtWidgets.QSpinBox()
+        for spin in (self.spin_filter_from, self.spin_filter_to):
+            spin.setRange(0, 1000000)
+            spin.setSpecialValueText("Any")  # 0 means no limit
+        self.edit_filter_revenue = QtWidgets.QLineEdit()
+        self.edit_filter_revenue.setPlaceholderText("Any")
+        self.edit_filter_revenue.setValidator(QtGui.QDoubleValidator())
+        self.btn_clear_filter = QtWidgets.QPushButton("Clear")
+        filter_layout.addWidget(QtWidgets.QLabel("Filter:"))
+        filter_layout.addWidget(self.edit_filter_product)
+        filter_layout.addWidget(QtWidgets.QLabel("Day from"))
+        filter_layout.addWidget(self.spin_filter_from)
+        filter_layout.addWidget(QtWidgets.QLabel("to"))
+        filter_layout.addWidget(self.spin_filter_to)
+        filter_layout.addWidget(QtWidgets.QLabel("Min revenue"))
+        filter_layout.addWidget(self.edit_filter_revenue)
+        filter_layout.addWidget(self.btn_clear_filter)
+        layout.addLayout(filter_layout)
+
+        self.sales_model = SalesTableModel(self.manager, self)
+        self.table_sales = QtWidgets.QTableView()
+        self.table_sales.setModel(self.sales_model)
+        self.table_sales.setSortingEnabled(True)
+        self.table_sales.horizontalHeader().setSortIndicator(-1, QtCore.Qt.AscendingOrder)  # Ledger order
         self.table_sales.horizontalHeader().setStretchLastSection(True)
+        self.table_sales.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         layout.addWidget(self.table_sales)
 
+        self.edit_filter_product.textChanged.connect(self.filter_sales)
+        self.spin_filter_from.valueChanged.connect(self.filter_sales)
+        self.spin_filter_to.valueChanged.connect(self.filter_sales)
+        self.edit_filter_revenue.textChanged.connect(self.filter_sales)
+        self.btn_clear_filter.clicked.connect(self.clear_sales_filter)
+
+        adjust_layout = QtWidgets.QHBoxLayout()
+        self.btn_void_sale = QtWidgets.QPushButton("Void Selected Sale")
+        self.btn_return_sale = QtWidgets.QPushButton("Return Items...")
+        adjust_layout.addWidget(self.btn_void_sale)
+        adjust_layout.addWidget(self.btn_return_sale)
+        layout.addLayout(adjust_layout)
+        self.btn_void_sale.clicked.connect(self.void_sale)
+        self.btn_return_sale.clicked.connect(self.return_sale)
+
         self.tab_sales.setLayout(layout)
         self.load_sales_to_table()
-        self.update_product_combo()
-
-    def update_product_combo(self):
-        self.combo_products.clear()
-        for product in self.manager.products:
-            self.combo_products.addItem(product.get("name", ""))
 
     def record_sale(self):
-        index = self.combo_products.currentIndex()
+        index = self.combo_products.current_product()
         quantity = self.spin_quantity.value()
         success, message = self.manager.record_sale(index, quantity)
         if success:
@@ -372,22 +358,172 @@ class MainWindow(QtWidgets.QMainWindow):
             self.load_products_to_table()
             self.load_sales_to_table()
             self.check_sale_alert(index)
+            if not self.showing_all_stores():
+                self.update_analysis()  # Cheap now: only the changed artists are redrawn
+        else:
+            QtWidgets.QMessageBox.warning(self, "Error", message)
+
+    def add_to_basket(self):
+        index = self.combo_products.current_product()
+        if index < 0:
+            QtWidgets.QMessageBox.warning(self, "Error", "Invalid product!")
+            return
+        # The line is kept by product name, also when the box holds a typed SKU
+        self.add_basket_line(self.manager.products[index]["name"], self.spin_quantity.value())
+
+    def scan_barcode(self):
+        # No dialogs here, so the next scan is never blocked: unknown codes beep and show in the status bar
+        code = self.edit_scan.text().strip()
+        self.edit_scan.clear()
+        if not code:
+            return
+        index = self.manager.find_by_sku(code)
+        if index < 0:
+            QtWidgets.QApplication.beep()
+            self.statusBar().showMessage(f"Unknown barcode: {code}", 3000)
+            return
+        name = self.manager.products[index]["name"]
+        self.add_basket_line(name, 1)
+        self.statusBar().showMessage(f"Scanned: {name}", 3000)
+
+    def remove_from_basket(self):
+        rows = sorted({item.row() for item in self.table_basket.selectedItems()}, reverse=True)
+        for row in rows:
+            del self.basket[row]
+        self.load_basket_to_table()
+
+    def add_basket_line(self, name, quantity):
+        # A product already in the basket gets the quantity added to its line; only that line and the total are redrawn
+        row = self.basket_rows.get(name)
+        if row is None:
+            row = len(self.basket)
+            self.basket_rows[name] = row
+            self.basket.append((name, quantity))
+            self.basket_amounts.append(0)
+            self.table_basket.setRowCount(len(self.basket) + 1)
+        else:
+            self.basket[row] = (name, self.basket[row][1] + quantity)
+        self.show_basket_line(row)
+        self.show_basket_total()
+
+    def show_basket_line(self, row):
+        # Amounts are quoted with today's pricing rules, as checkout will charge them
+        name, quantity = self.basket[row]
+        amount, discount, promo = 0, 0, None
+        index = self.manager.find_by_name(name)
+        if index >= 0:
+            amount, discount, promo = self.manager.pricing.quote(self.manager.products[index], quantity)
+        self.basket_total_cents += amount - self.basket_amounts[row]
+        self.basket_amounts[row] = amount
+        text = format_cents(amount)
+        if discount:
+            text += f" ({format_cents(discount)} off, {promo})"
+        self.table_basket.setItem(row, 0, QtWidgets.QTableWidgetItem(name))
+        self.table_basket.setItem(row, 1, QtWidgets.QTableWidgetItem(str(quantity)))
+        self.table_basket.setItem(row, 2, QtWidgets.QTableWidgetItem(text))
+
+    def show_basket_total(self):
+        row = len(self.basket)
+        self.table_basket.setItem(row, 0, QtWidgets.QTableWidgetItem("Total"))
+        self.table_basket.setItem(row, 1, QtWidgets.QTableWidgetItem(""))
+        self.table_basket.setItem(row, 2, QtWidgets.QTableWidgetItem(format_cents(self.basket_total_cents)))
+
+    def load_basket_to_table(self):
+        # Redraws every line, after lines were removed or products and prices changed
+        self.basket_rows = {name: row for row, (name, _) in enumerate(self.basket)}
+        self.basket_amounts = [0] * len(self.basket)
+        self.basket_total_cents = 0
+        self.table_basket.setRowCount(len(self.basket) + 1)
+        for row in range(len(self.basket)):
+            self.show_basket_line(row)
+        self.show_basket_total()
+
+    def checkout(self):
+        # The basket is kept by name, so product edits while it is open don't shift its lines
+        missing = [name for name, _ in self.basket if self.manager.find_by_name(name) < 0]
+        if missing:
+            QtWidgets.QMessageBox.warning(self, "Error", "No longer a product: " + ", ".join(missing))
+            return
+        lines = [(self.manager.find_by_name(name), quantity) for name, quantity in self.basket]
+        success, message = self.manager.record_transaction(lines)
+        if success:
+            QtWidgets.QMessageBox.information(self, "Success", message)
+            self.basket = []
+            self.load_basket_to_table()
+            self.load_products_to_table()
+            self.load_sales_to_table()
+            for index in sorted({index for index, _ in lines}):
+                self.check_sale_alert(index)
+            if not self.showing_all_stores():
+                self.update_analysis()
         else:
             QtWidgets.QMessageBox.warning(self, "Error", message)
 
-    def load_sales_to_table(self):
-        sales = self.manager.sales
-        self.table_sales.setRowCount(len(sales))
-        for row, sale in enumerate(sales):
-            self.table_sales.setItem(row, 0, QtWidgets.QTableWidgetItem(sale.get("product", "")))
-            self.table_sales.setItem(row, 1, QtWidgets.QTableWidgetItem(str(sale.get("quantity", 0))))
-            self.table_sales.setItem(row, 2, QtWidgets.QTableWidgetItem(f"{sale.get('revenue', 0):.2f}"))
-            self.table_sales.setItem(row, 3, QtWidgets.QTableWidgetItem(f"{sale.get('profit', 0):.2f}"))
-            self.table_sales.setItem(row, 4, QtWidgets.QTableWidgetItem(str(sale.get("day", 1))))
+    def load_sales_to_table(self, rebuild=False):
+        # New sales are appended to the model's index; rebuild after records were changed or removed
+        self.sales_model.refresh(rebuild)
+
+    def filter_sales(self):
+        revenue = self.edit_filter_revenue.text()
+        try:
+            min_revenue = to_cents(float(revenue)) if revenue else None
+        except ValueError:
+            min_revenue = None  # Still being typed, e.g. "-"
+        self.sales_model.set_filter(
+            product_text=self.edit_filter_product.text(),
+            first_day=self.spin_filter_from.value() or None,
+            last_day=self.spin_filter_to.value() or None,
+            min_revenue=min_revenue)
+
+    def clear_sales_filter(self):
+        for widget in (self.edit_filter_product, self.edit_filter_revenue):
+            widget.blockSignals(True)
+            widget.clear()
+            widget.blockSignals(False)
+        for widget in (self.spin_filter_from, self.spin_filter_to):
+            widget.blockSignals(True)
+            widget.setValue(0)
+            widget.blockSignals(False)
+        self.filter_sales()
+
+    def selected_sale(self):
+        # Ledger position of the selected row
+        selected = self.table_sales.selectionModel().selectedRows()
+        if not selected:
+            QtWidgets.QMessageBox.warning(self, "Alert", "Please select a sale")
+            return None
+        return self.sales_model.ledger_row(selected[0].row())
+
+    def void_sale(self):
+        row = self.selected_sale()
+        if row is not None:
+            self.adjust_sale(row, None, "void")
+
+    def return_sale(self):
+        row = self.selected_sale()
+        if row is None:
+            return
+        sale = self.manager.sales[row]
+        remaining = sale["quantity"] - self.manager.returned.get(row, 0)
+        quantity, ok = QtWidgets.QInputDialog.getInt(
+            self, "Return Items", f"Units of {sale['product']} returned:", 1, 1, max(remaining, 1))
+        if ok:
+            self.adjust_sale(row, quantity, "return")
+
+    def adjust_sale(self, row, quantity, kind):
+        success, message = self.manager.return_sale(row, quantity, kind)
+        if success:
+            QtWidgets.QMessageBox.information(self, "Success", message)
+            self.load_products_to_table()
+            self.load_sales_to_table()
+            if not self.showing_all_stores():
+                self.update_analysis()
+        else:
+            QtWidgets.QMessageBox.warning(self, "Error", message)
 
     def check_sale_alert(self, product_index):
         product = self.manager.products[product_index]
-        if product["quantity"] < product.get("restock_threshold", 10):
+        if product["quantity"] < self.manager.get_restock_threshold(product):
             if product["name"] not in self.alerted_products:
                 QtWidgets.QMessageBox.information(
                     self,
@@ -400,9 +536,9 @@ class MainWindow(QtWidgets.QMainWindow):
         # At startup, check all products for low stock and alert once if needed.
         alerts = []
         for product in self.manager.products:
-            if product["quantity"] < product.get("restock_threshold", 10):
-                alerts.append(
-                    f"{product['name']} (Quantity: {product['quantity']} < {product.get('restock_threshold', 10)})")
+            threshold = self.manager.get_restock_threshold(product)
+            if product["quantity"] < threshold:
+                alerts.append(f"{product['name']} (Quantity: {product['quantity']} < {threshold})")
                 self.alerted_products.add(product["name"])
         if alerts:
             msg = "The following products have low stock:\n" + "\n".join(alerts)
@@ -421,9 +557,34 @@ class MainWindow(QtWidgets.QMainWindow):
         self.label_summary.setFont(bigger_font)
         layout.addWidget(self.label_summary)
 
+        # In a multi-store setup, the analysis can cover this store or the whole chain
+        self.combo_scope = QtWidgets.QComboBox()
+        self.combo_scope.addItems(["This Store", "All Stores"])
+        self.combo_scope.setVisible(self.manager.store is not None)
+        self.combo_scope.currentIndexChanged.connect(self.update_analysis)
+        layout.addWidget(self.combo_scope)
+
+        # Per-product charts and the valuation panel can be narrowed to an ABC class (by revenue)
+        self.combo_class = QtWidgets.QComboBox()
+        self.combo_class.addItems(["All Products", "Class A", "Class B", "Class C"])
+        self.combo_class.currentIndexChanged.connect(self.update_analysis)
+        layout.addWidget(self.combo_class)
+
         self.figure = Figure(figsize=(10, 8))
         self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(NavigationToolbar(self.canvas, self.tab_analysis))  # Zoom in to see more detail
         layout.addWidget(self.canvas)
+        self.charts = AnalysisCharts(self.figure)
+
+        # Margin and stock valuation per product; click a header to sort
+        self.valuation_model = ValuationModel(self)
+        self.table_valuation = QtWidgets.QTableView()
+        self.table_valuation.setModel(self.valuation_model)
+        self.table_valuation.setSortingEnabled(True)
+        self.table_valuation.horizontalHeader().setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        self.table_valuation.horizontalHeader().setStretchLastSection(True)
+        self.table_valuation.setMaximumHeight(220)
+        layout.addWidget(self.table_valuation)
 
         self.btn_refresh_analysis = QtWidgets.QPushButton("Refresh Analysis")
         layout.addWidget(self.btn_refresh_analysis)
@@ -432,78 +593,41 @@ class MainWindow(QtWidgets.QMainWindow):
         self.tab_analysis.setLayout(layout)
         self.update_analysis()
 
+    def showing_all_stores(self):
+        return self.manager.store is not None and self.combo_scope.currentIndex() == 1
+
     def update_analysis(self):
-        best, best_qty = self.manager.get_best_selling()
-        worst, worst_qty = self.manager.get_worst_selling()
-        summary_text = (f"Total Revenue: {self.manager.total_revenue:.2f}    "
-                        f"Total Profit: {self.manager.total_profit:.2f}\n")
+        with ANALYSIS_SECONDS.time():
+            self.refresh_analysis()
+        if self.memory_profiler is not None:
+            self.memory_profiler.report("refresh", self.manager, self)
+
+    def refresh_analysis(self):
+        all_stores = self.showing_all_stores()
+        if all_stores:
+            aggregates, products = self.manager.get_chain_view()  # Store shards are read in parallel
+        else:
+            aggregates, products = self.manager.aggregates, self.manager.products
+        if self.combo_class.currentIndex() > 0:
+            products = self.manager.products_in_class("ABC"[self.combo_class.currentIndex() - 1],
+                                                      aggregates=aggregates, products=products)
+        best, best_qty = self.manager.get_best_selling(aggregates)
+        worst, worst_qty = self.manager.get_worst_selling(aggregates)
+        summary_text = (f"Total Revenue: {format_cents(aggregates.total_revenue_cents)}    "
+                        f"Total Profit: {format_cents(aggregates.total_profit_cents)}\n")
         summary_text += f"Best-selling Product: {best} (Quantity: {best_qty})\n" if best else "Best-selling Product: N/A\n"
         summary_text += f"Worst-selling Product: {worst} (Quantity: {worst_qty})\n" if worst else "Worst-selling Product: N/A\n"
+        scope = "all stores" if all_stores else ("store", self.manager.store)
+        self.valuation_model.refresh(aggregates, products, self.manager.current_day, scope)
+        value_cost, value_retail = self.valuation_model.totals()
+        summary_text += f"Stock Value: {format_cents(value_cost)} at cost, {format_cents(value_retail)} at retail\n"
         summary_text += f"Current Day: {self.manager.current_day}"
         self.label_summary.setText(summary_text)
 
-        # Prepare data for charts based on day timeline
-        days = list(range(1, self.manager.current_day + 1))
-        revenue_by_day = {day: 0 for day in days}
-        profit_by_day = {day: 0 for day in days}
-
-        for sale in self.manager.sales:
-            d = sale.get("day", 1)
-            if d in revenue_by_day:
-                revenue_by_day[d] += sale.get("revenue", 0)
-                profit_by_day[d] += sale.get("profit", 0)
-
-        product_sales = {}
-        for product in self.manager.products:
-            product_sales[product["name"]] = [0] * self.manager.current_day
-        for sale in self.manager.sales:
-            d = sale.get("day", 1)
-            product_name = sale["product"]
-            if 1 <= d <= self.manager.current_day:
-                # 如果销售记录中的产品名称不在当前产品列表中，则跳过（或者可以考虑合并记录）
-                if product_name in product_sales:
-                    product_sales[product_name][d - 1] += sale.get("quantity", 0)
-
-        # Clear figure and create 2x2 subplots
-        self.figure.clear()
-        ax1 = self.figure.add_subplot(221)  # Top-left: Revenue Trend
-        ax2 = self.figure.add_subplot(222)  # Top-right: Profit Trend
-        ax3 = self.figure.add_subplot(223)  # Bottom-left: Product Sales Trend
-        ax4 = self.figure.add_subplot(224)  # Bottom-right: Inventory Status
-
-        # Plot Revenue Trend
-        rev_values = [revenue_by_day[day] for day in days]
-        ax1.plot(days, rev_values, marker="o")
-        ax1.set_title("Sales Revenue Trend")
-        ax1.set_xlabel("Day")
-        ax1.set_ylabel("Revenue")
-
-        # Plot Profit Trend
-        profit_values = [profit_by_day[day] for day in days]
-        ax2.plot(days, profit_values, marker="o", color="green")
-        ax2.set_title("Total Profit Trend")
-        ax2.set_xlabel("Day")
-        ax2.set_ylabel("Profit")
-
-        # Plot Individual Product Sales Trend
-        for product_name, sales_list in product_sales.items():
-            ax3.plot(days, sales_list, marker="o", label=product_name)
-        ax3.set_title("Product Sales Trend")
-        ax3.set_xlabel("Day")
-        ax3.set_ylabel("Quantity Sold")
-        ax3.legend()
-
-        # Plot Inventory Status
-        names = [p.get("name", "") for p in self.manager.products]
-        quantities = [p.get("quantity", 0) for p in self.manager.products]
-        ax4.bar(names, quantities)
-        ax4.set_title("Inventory Status")
-        ax4.set_xlabel("Product")
-        ax4.set_ylabel("Current Stock")
-
-        # Make subplots layout cleaner to avoid overlap
-        self.figure.tight_layout()
-        self.canvas.draw()
+        # Update the existing artists from the incrementally maintained aggregates;
+        # the figure is only fully redrawn when axes need rescaling
+        inputs = chart_inputs(aggregates, products, self.manager.current_day, self.manager.price_history)
+        self.charts.update(*inputs)
 
     def advance_day(self):
         self.manager.advance_day()
@@ -511,21 +635,71 @@ class MainWindow(QtWidgets.QMainWindow):
         self.update_status_bar()
         # Update the toolbar label
         self.day_label.setText(f"Day: {self.manager.current_day}")
+        self.load_products_to_table()  # Reorder points change with the new day
+        self.load_basket_to_table()  # ...and so can promotions
         self.update_analysis()
 
+    def undo(self):
+        success, message = self.manager.undo()
+        self.show_undo_result(success, message)
+
+    def redo(self):
+        success, message = self.manager.redo()
+        self.show_undo_result(success, message)
+
+    def show_undo_result(self, success, message):
+        if not success:
+            self.statusBar().showMessage(message, 3000)
+            return
+        self.day_label.setText(f"Day: {self.manager.current_day}")
+        self.load_products_to_table()
+        self.combo_products.refresh()
+        self.load_basket_to_table()
+        self.load_sales_to_table(rebuild=True)
+        self.valuation_model.invalidate()
+        self.update_analysis()
+        self.statusBar().showMessage(f"{message}    Current Day: {self.manager.current_day}")
+
 
 # ---------------------------
 # Main entry
 # ---------------------------
-def main():
-    app = QtWidgets.QApplication(sys.argv)
+def main(size=None, font_size=14):
+    # size: initial window size (width, height); font_size: application font in points, or None for
+    # the system default. Little.py, Medium.py and Large.py start the same window at other sizes.
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--store", help="Run as this store of a multi-store setup")
+    parser.add_argument("--dashboard", type=int, metavar="PORT",
+                        help="Serve a live dashboard of this window's data on localhost:PORT")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="Serve Prometheus metrics on localhost:PORT/metrics")
+    parser.add_argument("--metrics-file", metavar="PATH", help="Write Prometheus metrics to this file periodically")
+    parser.add_argument("--memory-profile", nargs="?", const="", metavar="LOG",
+                        help="Report memory by subsystem at startup and after each refresh (and append to LOG)")
+    args, qt_args = parser.parse_known_args()
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
 
     # 1) 设置全局大字体(不影响Matplotlib图表字体)
-    big_font = QtGui.QFont()
-    big_font.setPointSize(14)  # 可根据需求调整字号
-    app.setFont(big_font)
-
-    window = MainWindow()
+    if font_size is not None:
+        big_font = QtGui.QFont()
+        big_font.setPointSize(font_size)  # 可根据需求调整字号
+        app.setFont(big_font)
+
+    # Started before the window so that tracemalloc sees the data being loaded
+    profiler = MemoryProfiler(args.memory_profile or None) if args.memory_profile is not None else None
+    window = MainWindow(args.store, profiler)
+    if size is not None:
+        window.resize(*size)
+    if args.dashboard:
+        start_dashboard(window.manager, args.dashboard)
+    manager = window.manager
+    metrics.gauge("inventory_current_day", "Current business day", lambda: manager.current_day)
+    metrics.gauge("inventory_low_stock_products", "Products below their restock threshold",
+                  lambda: len(manager.check_restock()))
+    if args.metrics_port:
+        metrics.start_metrics_server(args.metrics_port)
+    if args.metrics_file:
+        metrics.start_metrics_dump(args.metrics_file)
 
     # 2) 将工具栏图标变大
     window.toolbar.setIconSize(QtCore.QSize(32, 32))  # 可根据需求调整图标大小
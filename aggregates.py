@@ -0,0 +1,257 @@
+import heapq
+
+import numpy as np
+
+from money import CENTS
+from pareto import ParetoClassifier
+
+
+def cents_column(columns, field):
+    # A money column as int64 cents; tables written before money was kept in cents have float amounts
+    if field + "_cents" in columns:
+        return np.asarray(columns[field + "_cents"], dtype=np.int64)
+    return np.rint(np.asarray(columns[field], dtype=float) * CENTS).astype(np.int64)
+
+
+# ---------------------------
+# ProductRanking: best and worst sellers in two heaps with lazy deletion. An update pushes a new
+# entry and outdated ones are dropped when they reach the top, so a change costs O(log n).
+# ---------------------------
+class ProductRanking:
+    def __init__(self, quantities):
+        self.quantities = dict(quantities)  # name -> quantity sold
+        self.rebuild()
+
+    def rebuild(self):
+        self.best_heap = [(-quantity, name) for name, quantity in self.quantities.items()]
+        self.worst_heap = [(quantity, name) for name, quantity in self.quantities.items()]
+        heapq.heapify(self.best_heap)
+        heapq.heapify(self.worst_heap)
+
+    def update(self, name, quantity):
+        self.quantities[name] = quantity
+        heapq.heappush(self.best_heap, (-quantity, name))
+        heapq.heappush(self.worst_heap, (quantity, name))
+        if len(self.best_heap) > 2 * len(self.quantities) + 64:
+            self.rebuild()  # Too many outdated entries
+
+    def discard(self, name):
+        self.quantities.pop(name, None)
+
+    def best(self):
+        heap = self.best_heap
+        while heap:
+            quantity, name = heap[0]
+            if self.quantities.get(name) == -quantity:
+                return name, -quantity
+            heapq.heappop(heap)
+        return None, 0
+
+    def worst(self):
+        heap = self.worst_heap
+        while heap:
+            quantity, name = heap[0]
+            if self.quantities.get(name) == quantity:
+                return name, quantity
+            heapq.heappop(heap)
+        return None, 0
+
+
+# ---------------------------
+# SalesAggregates: running totals and per-day series, updated one sale at a time
+# ---------------------------
+class SalesAggregates:
+    def __init__(self):
+        # Money is in integer cents, so totals stay exact however many sales are added
+        self.total_revenue_cents = 0
+        self.total_profit_cents = 0
+        self.revenue_cents_by_day = {}  # day -> revenue in cents
+        self.profit_cents_by_day = {}  # day -> profit in cents
+        self.quantity_by_product = {}  # product name -> total quantity sold
+        self.product_by_day = {}  # product name -> {day: quantity sold}
+        self.value_by_product = {"revenue": {}, "profit": {}}  # metric -> product name -> cents
+        self.ranking = None  # ProductRanking, built by get_ranking on first use
+        self.pareto = {}  # metric -> ParetoClassifier, built by get_pareto on first use
+
+    def add_sale(self, sale):
+        day = sale["day"]
+        revenue = sale["revenue_cents"]
+        profit = sale["profit_cents"]
+        name = sale["product"]
+        quantity = sale["quantity"]
+        self.total_revenue_cents += revenue
+        self.total_profit_cents += profit
+        self.revenue_cents_by_day[day] = self.revenue_cents_by_day.get(day, 0) + revenue
+        self.profit_cents_by_day[day] = self.profit_cents_by_day.get(day, 0) + profit
+        self.quantity_by_product[name] = self.quantity_by_product.get(name, 0) + quantity
+        by_day = self.product_by_day.setdefault(name, {})
+        by_day[day] = by_day.get(day, 0) + quantity
+        self.add_product_value(name, revenue, profit)
+        if self.ranking is not None:
+            self.ranking.update(name, self.quantity_by_product[name])
+
+    def add_product_value(self, name, revenue, profit):
+        for metric, amount in (("revenue", revenue), ("profit", profit)):
+            values = self.value_by_product[metric]
+            values[name] = values.get(name, 0) + amount
+            if metric in self.pareto:
+                self.pareto[metric].update(name, values[name])
+            if values[name] == 0:
+                del values[name]
+
+    def remove_sale(self, sale):
+        # Exact inverse of add_sale; entries that drop to zero are removed so the series stay sparse
+        day = sale["day"]
+        name = sale["product"]
+        quantity = sale["quantity"]
+        self.total_revenue_cents -= sale["revenue_cents"]
+        self.total_profit_cents -= sale["profit_cents"]
+        self.revenue_cents_by_day[day] = self.revenue_cents_by_day.get(day, 0) - sale["revenue_cents"]
+        self.profit_cents_by_day[day] = self.profit_cents_by_day.get(day, 0) - sale["profit_cents"]
+        self.quantity_by_product[name] = self.quantity_by_product.get(name, 0) - quantity
+        by_day = self.product_by_day.setdefault(name, {})
+        by_day[day] = by_day.get(day, 0) - quantity
+        if by_day[day] == 0:
+            del by_day[day]
+        self.add_product_value(name, -sale["revenue_cents"], -sale["profit_cents"])
+        if self.ranking is not None:
+            self.ranking.update(name, self.quantity_by_product[name])
+        if self.quantity_by_product[name] == 0:
+            del self.quantity_by_product[name]
+            if not by_day:
+                del self.product_by_day[name]
+
+    def add_sales(self, sales):
+        for sale in sales:
+            self.add_sale(sale)
+
+    def add_table(self, table):
+        # Bulk add_sale for a columnar table (columnar.read_table), grouped with numpy instead of per record
+        if not table["count"]:
+            return
+        self.ranking = None
+        self.pareto = {}
+        columns = table["columns"]
+        names = table["products"]
+        day = np.asarray(columns["day"], dtype=np.int64)
+        quantity = np.asarray(columns["quantity"], dtype=np.int64)
+        revenue = cents_column(columns, "revenue")
+        profit = cents_column(columns, "profit")
+        product = np.asarray(columns["product"], dtype=np.int64)
+        for metric, amounts in (("revenue", revenue), ("profit", profit)):
+            by_code = np.zeros(len(names), dtype=np.int64)
+            np.add.at(by_code, product, amounts)
+            values = self.value_by_product[metric]
+            for name, amount in zip(names, by_code.tolist()):
+                values[name] = values.get(name, 0) + amount
+                if values[name] == 0:
+                    del values[name]
+        self.total_revenue_cents += int(revenue.sum())
+        self.total_profit_cents += int(profit.sum())
+
+        days, day_index = np.unique(day, return_inverse=True)
+        day_revenue = np.zeros(len(days), dtype=np.int64)
+        day_profit = np.zeros(len(days), dtype=np.int64)
+        np.add.at(day_revenue, day_index, revenue)  # Integer sums; bincount would go through float
+        np.add.at(day_profit, day_index, profit)
+        for d, r, p in zip(days.tolist(), day_revenue.tolist(), day_profit.tolist()):
+            self.revenue_cents_by_day[d] = self.revenue_cents_by_day.get(d, 0) + r
+            self.profit_cents_by_day[d] = self.profit_cents_by_day.get(d, 0) + p
+
+        # One group per (product, day) pair
+        first_day = int(days[0])
+        span = int(days[-1]) - first_day + 1
+        keys, key_index = np.unique(product * span + (day - first_day), return_inverse=True)
+        key_quantity = np.bincount(key_index, weights=quantity).astype(np.int64)
+        for key, qty in zip(keys.tolist(), key_quantity.tolist()):
+            name = names[key // span]
+            d = key % span + first_day
+            self.quantity_by_product[name] = self.quantity_by_product.get(name, 0) + qty
+            by_day = self.product_by_day.setdefault(name, {})
+            by_day[d] = by_day.get(d, 0) + qty
+
+    def rename_product(self, old_name, new_name):
+        # Fold the history of old_name into new_name, the same way edit_product rewrites sales records
+        self.ranking = None
+        self.pareto = {}
+        for values in self.value_by_product.values():
+            if old_name in values:
+                values[new_name] = values.get(new_name, 0) + values.pop(old_name)
+        # Each map is folded on its own: a sale returned on a later day nets to no quantity but keeps its days
+        if old_name in self.quantity_by_product:
+            quantity = self.quantity_by_product.pop(old_name)
+            self.quantity_by_product[new_name] = self.quantity_by_product.get(new_name, 0) + quantity
+        if old_name in self.product_by_day:
+            old_days = self.product_by_day.pop(old_name)
+            by_day = self.product_by_day.setdefault(new_name, {})
+            for day, qty in old_days.items():
+                by_day[day] = by_day.get(day, 0) + qty
+
+    def merge(self, other):
+        # Combine partial aggregates (e.g. from another store or file) into this one
+        self.ranking = None
+        self.pareto = {}
+        for metric, other_values in other.value_by_product.items():
+            values = self.value_by_product[metric]
+            for name, value in other_values.items():
+                values[name] = values.get(name, 0) + value
+        self.total_revenue_cents += other.total_revenue_cents
+        self.total_profit_cents += other.total_profit_cents
+        for day, value in other.revenue_cents_by_day.items():
+            self.revenue_cents_by_day[day] = self.revenue_cents_by_day.get(day, 0) + value
+        for day, value in other.profit_cents_by_day.items():
+            self.profit_cents_by_day[day] = self.profit_cents_by_day.get(day, 0) + value
+        for name, quantity in other.quantity_by_product.items():
+            self.quantity_by_product[name] = self.quantity_by_product.get(name, 0) + quantity
+        for name, other_days in other.product_by_day.items():
+            by_day = self.product_by_day.setdefault(name, {})
+            for day, qty in other_days.items():
+                by_day[day] = by_day.get(day, 0) + qty
+        return self
+
+    def daily_series(self, current_day):
+        # Returns (days, revenue per day, profit per day) for days 1..current_day, in cents
+        days = list(range(1, current_day + 1))
+        revenue = [self.revenue_cents_by_day.get(day, 0) for day in days]
+        profit = [self.profit_cents_by_day.get(day, 0) for day in days]
+        return days, revenue, profit
+
+    def get_ranking(self, products):
+        # Ranking over every product plus any other name with sales; rebuilt only after bulk changes
+        if self.ranking is None:
+            quantities = dict.fromkeys((p["name"] for p in products), 0)
+            quantities.update(self.quantity_by_product)
+            self.ranking = ProductRanking(quantities)
+        return self.ranking
+
+    def get_pareto(self, metric, products):
+        # ABC classes by "revenue" or "profit" over every product; kept up to date by add_sale/remove_sale
+        if metric not in self.pareto:
+            values = dict.fromkeys((p["name"] for p in products), 0)
+            values.update(self.value_by_product[metric])
+            self.pareto[metric] = ParetoClassifier(values)
+        return self.pareto[metric]
+
+    def track_product(self, name):
+        # A new product enters the ranking and the ABC classes with what it has sold so far
+        if self.ranking is not None and name not in self.ranking.quantities:
+            self.ranking.update(name, self.quantity_by_product.get(name, 0))
+        for metric, classifier in self.pareto.items():
+            if name not in classifier.values:
+                classifier.update(name, self.value_by_product[metric].get(name, 0))
+
+    def untrack_product(self, name):
+        if self.ranking is not None and name not in self.quantity_by_product:
+            self.ranking.discard(name)
+        for metric, classifier in self.pareto.items():
+            if name not in self.value_by_product[metric]:
+                classifier.discard(name)
+
+    def top_products(self, names, n):
+        # The n names with the highest quantity sold, best first
+        return heapq.nlargest(n, names, key=lambda name: self.quantity_by_product.get(name, 0))
+
+    def product_series(self, name, current_day):
+        # Quantity sold per day for one product, days 1..current_day
+        by_day = self.product_by_day.get(name, {})
+        return [by_day.get(day, 0) for day in range(1, current_day + 1)]
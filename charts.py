@@ -0,0 +1,232 @@
+import numpy as np
+
+from decimate import lttb, min_max, visible_slice
+from money import CENTS
+
+MARKER_LIMIT = 60  # Draw point markers only while this many points or fewer are visible
+POINTS_PER_PIXEL = 0.5  # Decimation target, relative to the axes width in pixels
+TOP_PRODUCTS = 10  # Number of products drawn in the Product Sales Trend panel
+
+
+def chart_inputs(aggregates, products, current_day, price_history=None):
+    # Collects the arguments of AnalysisCharts.update from the aggregates, the product list and,
+    # when given, the price history of the products drawn in the trend panel
+    days, revenue, profit = aggregates.daily_series(current_day)
+    revenue = np.asarray(revenue) / CENTS  # Plotted in currency units
+    profit = np.asarray(profit) / CENTS
+    # Only the best-selling products are drawn so the trend panel stays readable with a large catalog
+    catalog = [p["name"] for p in products]
+    product_series = {}
+    for name in aggregates.top_products(catalog, TOP_PRODUCTS):
+        product_series[name] = aggregates.product_series(name, current_day)
+    names = [p["name"] for p in products]
+    quantities = [p["quantity"] for p in products]
+    price_series = {}
+    if price_history is not None and days:
+        for name in product_series:
+            # Only the change points are drawn, as steps, extended to the last day
+            changes = [(day, price) for day, price, _ in price_history.changes(name) if day <= days[-1]]
+            if changes:
+                changes.append((days[-1], changes[-1][1]))
+                price_series[name] = ([day for day, _ in changes], [price / CENTS for _, price in changes])
+    return days, revenue, profit, product_series, names, quantities, price_series
+
+
+# ---------------------------
+# AnalysisCharts: the four analysis plots, built once and updated in place
+# ---------------------------
+class AnalysisCharts:
+    def __init__(self, figure):
+        self.figure = figure
+        self.canvas = figure.canvas
+        self.ax_revenue = figure.add_subplot(221)  # Top-left: Revenue Trend
+        self.ax_profit = figure.add_subplot(222)  # Top-right: Profit Trend
+        self.ax_products = figure.add_subplot(223)  # Bottom-left: Product Sales Trend
+        self.ax_stock = figure.add_subplot(224)  # Bottom-right: Inventory Status
+        self.set_labels(self.ax_revenue, "Sales Revenue Trend", "Day", "Revenue")
+        self.set_labels(self.ax_profit, "Total Profit Trend", "Day", "Profit")
+        self.set_labels(self.ax_products, "Product Sales Trend", "Day", "Quantity Sold")
+        self.set_labels(self.ax_stock, "Inventory Status", "Product", "Current Stock")
+        self.ax_prices = self.ax_products.twinx()  # Price changes of the same products, dashed
+        self.ax_prices.set_ylabel("Price")
+
+        # Data artists are animated so that they can be blitted over a cached background
+        self.revenue_line, = self.ax_revenue.plot([], [], marker="o", animated=True)
+        self.profit_line, = self.ax_profit.plot([], [], marker="o", color="green", animated=True)
+        self.product_lines = {}  # product name -> Line2D
+        self.price_lines = {}  # product name -> Line2D of its price steps
+        self.full_data = {}  # Line2D -> (x array, y array, decimation function) before decimation
+        self.updating = False
+        self.bar_container = None
+        self.bar_names = []
+        self.fitted_views = {}  # axes -> x ranges set by fit_axes, to tell them from the user's zoom
+
+        self.background = None
+        self.needs_layout = True
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+        self.canvas.mpl_connect("resize_event", self.on_resize)
+        # Zooming or panning re-decimates the visible range, so detail increases as the view narrows
+        for ax in (self.ax_revenue, self.ax_profit, self.ax_products):
+            ax.callbacks.connect("xlim_changed", self.on_xlim_changed)
+
+    @staticmethod
+    def set_labels(ax, title, xlabel, ylabel):
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+
+    def animated_artists(self):
+        artists = [self.revenue_line, self.profit_line]
+        artists.extend(self.product_lines.values())
+        artists.extend(self.price_lines.values())
+        if self.bar_container is not None:
+            artists.extend(self.bar_container.patches)
+        return artists
+
+    def on_draw(self, event):
+        # After every full draw, cache the static background and paint the data on top of it.
+        # When saving, matplotlib already draws animated artists itself.
+        if event.canvas is not self.canvas or self.canvas.is_saving():
+            return
+        if self.canvas.supports_blit:
+            self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self.animated_artists():
+            self.figure.draw_artist(artist)
+
+    def on_resize(self, event):
+        self.needs_layout = True
+        self.background = None
+
+    def on_xlim_changed(self, ax):
+        if not self.updating:
+            self.render_axes(ax)
+
+    def set_series(self, line, x, y, decimation):
+        self.full_data[line] = (np.asarray(x, dtype=float), np.asarray(y, dtype=float), decimation)
+
+    def render_axes(self, ax):
+        # Push the decimated visible part of every line on this axes into its artist
+        x_min, x_max = ax.get_xlim()
+        target = max(int(ax.bbox.width * POINTS_PER_PIXEL), 3)
+        for line in ax.get_lines():
+            if line not in self.full_data:
+                continue
+            x, y, decimation = self.full_data[line]
+            start, stop = visible_slice(x, x_min, x_max)
+            x, y = x[start:stop], y[start:stop]
+            if len(x) > target:
+                x, y = decimation(x, y, target)
+            line.set_data(x, y)
+            line.set_marker("o" if len(x) <= MARKER_LIMIT else "")
+
+    def update(self, days, revenue, profit, product_series, names, quantities, price_series=None):
+        # product_series: product name -> quantity sold per day, aligned with days;
+        # price_series: product name -> (days, prices) at the days its price changed
+        redraw = False
+        self.updating = True
+        self.set_series(self.revenue_line, days, revenue, lttb)
+        redraw |= self.fit_axes(self.ax_revenue, days, revenue)
+        self.set_series(self.profit_line, days, profit, lttb)
+        redraw |= self.fit_axes(self.ax_profit, days, profit)
+        redraw |= self.update_product_lines(days, product_series)
+        redraw |= self.update_price_lines(price_series or {})
+        redraw |= self.update_bars(names, quantities)
+        self.updating = False
+        for ax in (self.ax_revenue, self.ax_profit, self.ax_products):
+            self.render_axes(ax)
+
+        if redraw or self.background is None:
+            if self.needs_layout:
+                self.figure.tight_layout()
+                self.needs_layout = False
+            self.canvas.draw()
+        else:
+            self.blit()
+
+    def blit(self):
+        self.canvas.restore_region(self.background)
+        for artist in self.animated_artists():
+            self.figure.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
+
+    def update_product_lines(self, days, product_series):
+        changed = False
+        for name in list(self.product_lines):
+            if name not in product_series:
+                line = self.product_lines.pop(name)
+                self.full_data.pop(line, None)
+                line.remove()
+                changed = True
+        y_high = 0
+        for name, values in product_series.items():
+            line = self.product_lines.get(name)
+            if line is None:
+                line, = self.ax_products.plot([], [], label=name, animated=True)
+                self.product_lines[name] = line
+                changed = True
+            self.set_series(line, days, values, min_max)
+            y_high = max(y_high, max(values, default=0))
+        if changed:
+            if self.product_lines:
+                self.ax_products.legend()
+            elif self.ax_products.get_legend() is not None:
+                self.ax_products.get_legend().remove()
+        return self.fit_axes(self.ax_products, days, [0, y_high]) or changed
+
+    def update_price_lines(self, price_series):
+        changed = False
+        for name in list(self.price_lines):
+            if name not in price_series:
+                self.price_lines.pop(name).remove()
+                changed = True
+        y_high = 0
+        for name, (days, prices) in price_series.items():
+            line = self.price_lines.get(name)
+            if line is None:
+                color = self.product_lines[name].get_color() if name in self.product_lines else None
+                line, = self.ax_prices.plot([], [], linestyle="--", drawstyle="steps-post", color=color,
+                                            animated=True)
+                self.price_lines[name] = line
+                changed = True
+            line.set_data(days, prices)  # A few change points; nothing to decimate
+            y_high = max(y_high, max(prices, default=0))
+        return self.fit_axes(self.ax_prices, [], [0, y_high]) or changed
+
+    def update_bars(self, names, quantities):
+        changed = False
+        if names == self.bar_names:
+            for bar, quantity in zip(self.bar_container.patches, quantities):
+                bar.set_height(quantity)
+        else:
+            # The product list changed, so the bars and their tick labels are rebuilt
+            if self.bar_container is not None:
+                self.bar_container.remove()
+            positions = list(range(len(names)))
+            self.bar_container = self.ax_stock.bar(positions, quantities, animated=True)
+            self.ax_stock.set_xticks(positions)
+            self.ax_stock.set_xticklabels(names)
+            self.bar_names = list(names)
+            changed = True
+        return self.fit_axes(self.ax_stock, list(range(len(names))), quantities) or changed
+
+    def fit_axes(self, ax, x_values, y_values):
+        # Rescale only when the data leaves the current view or shrinks well inside it.
+        # Headroom above the data lets small increases be blitted without a full redraw.
+        # The x range follows the data unless the user has zoomed or panned away from every
+        # view set here (the toolbar's Home goes back to one of those, and following resumes).
+        changed = False
+        if x_values:
+            x_view = (x_values[0] - 0.5, x_values[-1] + 0.5)
+            fitted = self.fitted_views.setdefault(ax, set())
+            current = tuple(ax.get_xlim())
+            if current != x_view and (not fitted or current in fitted):
+                ax.set_xlim(*x_view)
+                changed = True
+            fitted.add(x_view)
+        y_low = min(min(y_values, default=0), 0)
+        y_high = max(y_values, default=0)
+        view_low, view_high = ax.get_ylim()
+        if y_low < view_low or y_high > view_high or (view_high > 1 and y_high < view_high / 2):
+            ax.set_ylim(y_low * 1.2, y_high * 1.2 if y_high > 0 else 1)
+            changed = True
+        return changed
@@ -0,0 +1,241 @@
+import io
+import json
+import os
+from typing import TypedDict
+
+from forecast import DEFAULT_LEAD_TIME
+from money import to_cents
+from storage import iter_json_array
+
+# Fast codecs are optional; the stdlib json module is always available as a fallback
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Compact (non-indented) files are smaller and faster to write; indented files are easier to edit by hand
+COMPACT = os.environ.get("INVENTORY_COMPACT_JSON", "") == "1"
+
+
+# ---------------------------
+# Record schemas
+# ---------------------------
+class _ProductRequired(TypedDict):
+    name: str
+
+
+class Product(_ProductRequired, total=False):
+    price_cents: int  # Required; older files have "price" instead (see LEGACY_MONEY)
+    cost_cents: int
+    price: float
+    cost: float
+    quantity: int  # Not stored in the shared definitions of a multi-store setup
+    restock_threshold: int
+    lead_time: int
+    auto_restock: bool
+    sku: str  # Barcode / SKU; empty when the product has none
+
+
+class _SaleRequired(TypedDict):
+    product: str
+    quantity: int
+
+
+class Sale(_SaleRequired, total=False):
+    revenue_cents: int
+    profit_cents: int
+    revenue: float
+    profit: float
+    day: int
+    kind: str  # Only on adjustments: "void" or "return", with negative quantity, revenue and profit
+    ref: int  # Only on adjustments: ledger position of the sale being reversed
+    txn: int  # Only on basket lines: the transaction id shared by the lines of one checkout
+    discount_cents: int  # Only on discounted sales: amount taken off by the pricing rule named in promo
+    promo: str
+
+
+class _RuleRequired(TypedDict):
+    name: str
+    type: str  # "percent", "fixed", "buy_x_get_y" or "tier"
+
+
+class Rule(_RuleRequired, total=False):
+    products: list  # Names of the products the rule applies to; empty for every product
+    start_day: int  # First day the rule is active; 0 for no start
+    end_day: int  # Last day the rule is active; 0 for no end
+    percent: float  # percent: percentage off the line
+    amount_cents: int  # fixed: amount off each unit
+    buy: int  # buy_x_get_y: for every `buy` units paid for, `free` more are free
+    free: int
+    tiers: list  # tier: [[minimum quantity, unit price in cents], ...]
+
+
+class ValidationError(ValueError):
+    pass
+
+
+def _field_checks(schema):
+    # field name -> (accepted types, conversion applied to accepted values)
+    checks = {}
+    for field, kind in schema.__annotations__.items():
+        if kind is float:
+            checks[field] = ((int, float), float)
+        else:
+            checks[field] = ((kind,), None)
+    return checks
+
+
+SCHEMAS = {
+    "product": (Product, Product.__required_keys__, _field_checks(Product)),
+    "sale": (Sale, Sale.__required_keys__, _field_checks(Sale)),
+    "rule": (Rule, Rule.__required_keys__, _field_checks(Rule)),
+}
+
+# Money used to be stored as float amounts. Those fields are still read, converted to integer cents
+# and dropped, so records in memory and everything written from now on use only the *_cents fields.
+LEGACY_MONEY = {
+    "product": {"price": "price_cents", "cost": "cost_cents"},
+    "sale": {"revenue": "revenue_cents", "profit": "profit_cents"},
+    "rule": {},
+}
+REQUIRED_MONEY = {"product": ("price_cents",), "sale": (), "rule": ()}
+
+# Values filled in for missing optional fields, so code using the records can index them directly
+DEFAULTS = {
+    "product": {"quantity": 0, "cost_cents": 0, "restock_threshold": 10, "lead_time": DEFAULT_LEAD_TIME, "auto_restock": False,
+                "sku": ""},
+    "sale": {"revenue_cents": 0, "profit_cents": 0, "day": 1},
+    "rule": {"products": [], "start_day": 0, "end_day": 0, "percent": 0.0, "amount_cents": 0, "buy": 0, "free": 0,
+             "tiers": []},
+}
+
+
+def validate(record, kind):
+    # Checks one record against its schema, converts ints to floats for float fields and fills in
+    # defaults for missing optional fields. Unknown fields are dropped, the same as the msgspec decoder does.
+    _, required, checks = SCHEMAS[kind]
+    if not isinstance(record, dict):
+        raise ValidationError(f"{kind} record must be an object, got {type(record).__name__}")
+    missing = required - record.keys()
+    if missing:
+        raise ValidationError(f"{kind} record is missing {', '.join(sorted(missing))}")
+    for field in record.keys() - checks.keys():
+        del record[field]
+    for field, value in record.items():
+        types, convert = checks[field]
+        # bool is a subclass of int, but a boolean quantity or price is always a mistake
+        if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+            raise ValidationError(f"{kind} field '{field}' should be {types[-1].__name__}, got {value!r}")
+        if convert is not None:
+            record[field] = convert(value)
+    return _finish(record, kind)
+
+
+def _finish(record, kind):
+    # Converts legacy money fields to cents, checks the money fields that are required and fills defaults
+    for old, new in LEGACY_MONEY[kind].items():
+        if old in record:
+            amount = record.pop(old)
+            if new not in record:
+                record[new] = to_cents(amount)
+    for field in REQUIRED_MONEY[kind]:
+        if field not in record:
+            raise ValidationError(f"{kind} record is missing {field}")
+    for field, value in DEFAULTS[kind].items():
+        if field not in record:
+            record[field] = list(value) if type(value) is list else value  # No list shared between records
+    return record
+
+
+# ---------------------------
+# Decoding
+# ---------------------------
+if msgspec is not None:
+    _decoders = {kind: msgspec.json.Decoder(list[schema]) for kind, (schema, _, _) in SCHEMAS.items()}
+
+
+def decode_records(data, kind):
+    # Decodes a JSON array of records and validates every record in the same pass
+    if msgspec is not None:
+        try:
+            records = _decoders[kind].decode(data)
+        except msgspec.ValidationError as e:
+            raise ValidationError(str(e)) from None
+        return [_finish(record, kind) for record in records]
+    if orjson is not None:
+        records = orjson.loads(data)
+    else:
+        records = json.loads(data)
+    if not isinstance(records, list):
+        raise ValidationError(f"expected a list of {kind} records")
+    return [validate(record, kind) for record in records]
+
+
+def load_records(data, kind, source):
+    # Like decode_records, but bad records are skipped instead of failing the whole file.
+    # Returns (records, errors); each error names the file and the line the record starts on.
+    try:
+        return decode_records(data, kind), []
+    except ValueError:
+        pass
+    # Slow path, only taken for files with problems: decode record by record to find the bad ones
+    records, errors = [], []
+    text = io.StringIO(data.decode("utf-8") if isinstance(data, bytes) else data)
+    items = iter_json_array(text, with_lines=True)
+    try:
+        for line, record in items:
+            try:
+                records.append(validate(record, kind))
+            except ValidationError as e:
+                errors.append(f"{source} line {line}: {e}")
+    except ValueError as e:
+        # Broken JSON syntax: the records before the error are kept
+        errors.append(f"{source}: {e}")
+    return records, errors
+
+
+def load_jsonl_records(data, kind, source):
+    # JSON Lines variant of load_records. The lines are joined into one array so the fast path still applies.
+    lines = data.splitlines()
+    try:
+        return decode_records(b"[" + b",".join(line for line in lines if line.strip()) + b"]", kind), []
+    except ValueError:
+        pass
+    records, errors = [], []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            records.append(validate(decode(line), kind))
+        except ValueError as e:
+            # Includes a line cut short by a crash while appending
+            errors.append(f"{source} line {number}: {e}")
+    return records, errors
+
+
+def decode(data):
+    # Untyped decode, for small files such as time.json
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# ---------------------------
+# Encoding
+# ---------------------------
+def encode(obj, compact=None):
+    # Returns UTF-8 bytes; the indented form matches what json.dump(indent=4) used to write
+    if compact is None:
+        compact = COMPACT
+    if msgspec is not None:
+        data = msgspec.json.encode(obj)
+        return data if compact else msgspec.json.format(data, indent=4)
+    if orjson is not None and compact:
+        return orjson.dumps(obj)
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=4).encode("utf-8")
@@ -0,0 +1,90 @@
+import gzip
+import os
+import zlib
+
+import codec
+
+# zstd compresses better and decompresses faster than gzip; gzip is always available
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COLUMNAR_VERSION = 1
+
+
+# ---------------------------
+# Columnar sale tables: one list per field, product names dictionary-encoded
+# ---------------------------
+def encode_table(sales):
+    # {"version", "count", "products": [names], "columns": {field: [values]}}; "product" holds name codes
+    fields = {}
+    for sale in sales:
+        for field in sale:
+            fields.setdefault(field, None)
+    columns = {field: [sale.get(field) for sale in sales] for field in fields}
+    names = {}
+    if "product" in columns:
+        columns["product"] = [names.setdefault(name, len(names)) for name in columns["product"]]
+    return {"version": COLUMNAR_VERSION, "count": len(sales), "products": list(names), "columns": columns}
+
+
+def decode_table(table):
+    # Back to sale records; fields missing from a record were stored as null and are left out again
+    columns = dict(table["columns"])
+    if "product" in columns:
+        names = table["products"]
+        columns["product"] = [names[code] for code in columns["product"]]
+    fields = list(columns)
+    records = [dict(zip(fields, values)) for values in zip(*columns.values())]
+    sparse = [field for field, values in columns.items() if None in values]
+    for field in sparse:
+        for record in records:
+            if record[field] is None:
+                del record[field]
+    return records
+
+
+def columnar_suffix():
+    return ".col.zst" if zstandard is not None else ".col.gz"
+
+
+def write_table(path, sales):
+    # The compressor follows the final path's suffix; the data goes to a temp file that then replaces it
+    data = codec.encode(encode_table(sales), compact=True)
+    if path.endswith(".zst"):
+        data = zstandard.ZstdCompressor(level=10).compress(data)
+    else:
+        data = gzip.compress(data, compresslevel=9)
+    temp_file = path + ".tmp"
+    with open(temp_file, "wb") as f:
+        f.write(data)
+    os.replace(temp_file, path)
+
+
+def read_table(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("needs the zstandard package to be read")
+        try:
+            data = zstandard.ZstdDecompressor().decompress(data)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"cannot decompress: {e}")
+    else:
+        try:
+            data = gzip.decompress(data)
+        except (OSError, EOFError, zlib.error) as e:
+            raise ValueError(f"cannot decompress: {e}")
+    table = codec.decode(data)
+    if table.get("version") != COLUMNAR_VERSION:
+        raise ValueError(f"unsupported columnar version {table.get('version')}")
+    lengths = {len(values) for values in table["columns"].values()}
+    if lengths and lengths != {table["count"]}:
+        raise ValueError("columns have different lengths")
+    return table
+
+
+def is_columnar(path):
+    return ".col." in path
@@ -0,0 +1,215 @@
+import collections
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import codec
+
+COALESCE_SECONDS = 0.5  # Changes within this interval go out as one delta
+HISTORY = 64  # Deltas kept for viewers that fall behind; further behind, they get the full state again
+RECENT_SALES = 20  # Sales listed per delta; the totals always cover all of them
+MAX_ALERTS = 50
+HEARTBEAT_SECONDS = 15
+
+
+def sse(event, data, version):
+    return f"event: {event}\nid: {version}\ndata: ".encode() + codec.encode(data, compact=True) + b"\n\n"
+
+
+# ---------------------------
+# DashboardFeed: mirrors the state the dashboard shows from manager events and gathers the
+# changes into one pending delta. Every COALESCE_SECONDS the delta is encoded once and the same
+# bytes go to every viewer, so a busy store costs one message per interval however many watch.
+# ---------------------------
+class DashboardFeed:
+    def __init__(self, state):
+        # state: {"day", "revenue_cents", "profit_cents", "stock": {name: quantity}, "alerts": [...]}
+        self.condition = threading.Condition()
+        self.state = state
+        self.pending = {}
+        self.version = 0
+        self.messages = collections.deque(maxlen=HISTORY)  # (version, encoded delta)
+        self.running = False
+
+    def on_event(self, event):
+        with self.condition:
+            kind = event["kind"]
+            state, pending = self.state, self.pending
+            if kind in ("sale", "sale_undone"):
+                sale = event["sale"]
+                sign = 1 if kind == "sale" else -1
+                state["revenue_cents"] += sign * sale["revenue_cents"]
+                state["profit_cents"] += sign * sale["profit_cents"]
+                pending["totals"] = {"revenue_cents": state["revenue_cents"], "profit_cents": state["profit_cents"]}
+                pending["sale_count"] = pending.get("sale_count", 0) + sign
+                if kind == "sale":
+                    sales = pending.setdefault("sales", [])
+                    sales.append({field: sale[field] for field in ("product", "quantity", "revenue_cents")})
+                    del sales[:-RECENT_SALES]
+            elif kind == "stock":
+                state["stock"][event["product"]] = event["quantity"]
+                pending.setdefault("stock", {})[event["product"]] = event["quantity"]
+            elif kind == "product_removed":
+                state["stock"].pop(event["product"], None)
+                pending.setdefault("stock", {})[event["product"]] = None
+            elif kind == "alert":
+                alert = {field: event[field] for field in ("product", "quantity", "threshold")}
+                state["alerts"] = (state["alerts"] + [alert])[-MAX_ALERTS:]
+                pending.setdefault("alerts", []).append(alert)
+            elif kind == "day":
+                state["day"] = event["day"]
+                state["alerts"] = []  # Alerts are per day, as in the window
+                pending["day"] = event["day"]
+
+    def flush(self):
+        with self.condition:
+            if not self.pending:
+                return
+            self.version += 1
+            self.messages.append((self.version, sse("delta", self.pending, self.version)))
+            self.pending = {}
+            self.condition.notify_all()
+
+    def snapshot(self):
+        # (version, encoded full state) for a viewer that is starting or has fallen behind
+        with self.condition:
+            self.flush()
+            return self.version, sse("state", self.state, self.version)
+
+    def wait(self, version, timeout):
+        # (latest version, deltas after `version`) once there are any, or no deltas on timeout;
+        # None for the deltas if they are no longer kept
+        with self.condition:
+            self.condition.wait_for(lambda: self.version > version or not self.running, timeout)
+            if self.version == version:
+                return version, []
+            if not self.messages or self.messages[0][0] > version + 1:
+                return self.version, None
+            return self.version, [data for v, data in self.messages if v > version]
+
+    def run(self):
+        while self.running:
+            time.sleep(COALESCE_SECONDS)
+            self.flush()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+
+PAGE = b"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Live Dashboard</title>
+<style>body{font-family:sans-serif;margin:2em}td,th{padding:2px 12px;text-align:left}.low{color:#c00}</style>
+</head><body>
+<h2>Day <span id="day"></span></h2>
+<p>Total Revenue: <b id="revenue"></b> &nbsp; Total Profit: <b id="profit"></b></p>
+<h3>Alerts</h3><ul id="alerts"></ul>
+<h3>Recent Sales</h3><ul id="sales"></ul>
+<h3>Stock</h3><table id="stock"></table>
+<script>
+let state = null;
+const money = c => (c / 100).toFixed(2);
+const esc = s => String(s).replace(/[&<>"]/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})[c]);
+function render() {
+  document.getElementById("day").textContent = state.day;
+  document.getElementById("revenue").textContent = money(state.revenue_cents);
+  document.getElementById("profit").textContent = money(state.profit_cents);
+  document.getElementById("alerts").innerHTML = state.alerts.map(a =>
+    `<li class="low">${esc(a.product)}: ${a.quantity} &lt; ${a.threshold}</li>`).join("");
+  document.getElementById("sales").innerHTML = (state.sales || []).map(s =>
+    `<li>${s.quantity} x ${esc(s.product)}: ${money(s.revenue_cents)}</li>`).join("");
+  document.getElementById("stock").innerHTML = "<tr><th>Product</th><th>Quantity</th></tr>" +
+    Object.entries(state.stock).map(([name, q]) => `<tr><td>${esc(name)}</td><td>${q}</td></tr>`).join("");
+}
+const source = new EventSource("/events");
+source.addEventListener("state", e => { state = JSON.parse(e.data); render(); });
+source.addEventListener("delta", e => {
+  const delta = JSON.parse(e.data);
+  if (delta.day !== undefined) { state.day = delta.day; state.alerts = []; }
+  if (delta.totals) Object.assign(state, delta.totals);
+  for (const [name, q] of Object.entries(delta.stock || {})) {
+    if (q === null) delete state.stock[name]; else state.stock[name] = q;
+  }
+  state.alerts = state.alerts.concat(delta.alerts || []);
+  state.sales = (delta.sales || []).concat(state.sales || []).slice(0, 20);
+  render();
+});
+</script></body></html>
+"""
+
+
+# ---------------------------
+# DashboardHandler: "/" is the page, "/events" the Server-Sent Events stream
+# ---------------------------
+class DashboardHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+        elif self.path == "/events":
+            self.stream()
+        else:
+            self.send_error(404)
+
+    def stream(self):
+        feed = self.server.feed
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            version, data = feed.snapshot()
+            self.wfile.write(data)
+            self.wfile.flush()
+            while feed.running:
+                version, messages = feed.wait(version, HEARTBEAT_SECONDS)
+                if messages is None:
+                    version, data = feed.snapshot()  # Too far behind for the kept deltas
+                    messages = [data]
+                self.wfile.write(b"".join(messages) if messages else b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The viewer went away
+
+    def log_message(self, format, *args):
+        pass  # One line per request would flood the console with a page full of viewers
+
+
+class DashboardServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Many viewers may (re)connect at once, e.g. after the window restarts
+
+
+def manager_state(manager):
+    # The dashboard's starting state; taken on the thread that changes the manager
+    return {
+        "day": manager.current_day,
+        "revenue_cents": manager.total_revenue_cents,
+        "profit_cents": manager.total_profit_cents,
+        "stock": {p["name"]: p["quantity"] for p in manager.products},
+        "alerts": [],
+    }
+
+
+def start_dashboard(manager, port, host="127.0.0.1"):
+    # Serves the live dashboard from background threads; returns the server (call stop_dashboard to end it)
+    feed = DashboardFeed(manager_state(manager))
+    feed.running = True
+    manager.events.subscribe(feed.on_event)
+    server = DashboardServer((host, port), DashboardHandler)
+    server.feed = feed
+    threading.Thread(target=feed.run, daemon=True).start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Live dashboard at http://{host}:{server.server_address[1]}/")
+    return server
+
+
+def stop_dashboard(manager, server):
+    manager.events.unsubscribe(server.feed.on_event)
+    server.feed.stop()
+    server.shutdown()
+    server.server_close()
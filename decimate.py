@@ -0,0 +1,56 @@
+import numpy as np
+
+
+# ---------------------------
+# Series decimation: reduce long day timelines to roughly one point per pixel
+# ---------------------------
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keeps the visual shape of a trend line with `threshold` points
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    every = (n - 2) / (threshold - 2)
+    picked = np.empty(threshold, dtype=int)
+    picked[0] = 0
+    picked[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        if end >= next_end:  # The last bucket is followed only by the final point
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        picked[i + 1] = a
+    return x[picked], y[picked]
+
+
+def min_max(x, y, n_buckets):
+    # Keeps the lowest and highest point of each bucket, so spikes in daily quantities are never lost
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_buckets < 1 or n <= 2 * n_buckets:
+        return x, y
+    size = -(-n // n_buckets)
+    rows = -(-n // size)
+    padded = np.full(rows * size, np.nan)
+    padded[:n] = y
+    grid = padded.reshape(rows, size)
+    base = np.arange(rows) * size
+    picked = np.unique(np.concatenate((
+        [0], base + np.nanargmin(grid, axis=1), base + np.nanargmax(grid, axis=1), [n - 1]
+    )))
+    return x[picked], y[picked]
+
+
+def visible_slice(x, x_min, x_max):
+    # Index range of the points inside [x_min, x_max], plus one neighbour on each side so lines reach the edges
+    start = max(int(np.searchsorted(x, x_min, side="left")) - 1, 0)
+    stop = min(int(np.searchsorted(x, x_max, side="right")) + 1, len(x))
+    return start, stop
@@ -0,0 +1,31 @@
+# ---------------------------
+# EventBus: InventoryManager announces changes here; listeners such as the live dashboard subscribe.
+# Events are dicts with a "kind":
+#   {"kind": "sale" / "sale_undone", "sale": sale record}
+#   {"kind": "stock", "product", "quantity"}
+#   {"kind": "product_removed", "product"}
+#   {"kind": "alert", "product", "quantity", "threshold"}
+#   {"kind": "day", "day"}
+# ---------------------------
+class EventBus:
+    def __init__(self):
+        self.subscribers = []
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def publish(self, kind, **fields):
+        # Listeners run on the publishing thread and must be quick; a failing one does not stop the others
+        if not self.subscribers:
+            return
+        event = dict(kind=kind, **fields)
+        for callback in list(self.subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print("Failed to deliver event:", e)
@@ -0,0 +1,132 @@
+import argparse
+import csv
+import gzip
+import io
+import itertools
+import json
+import os
+import sys
+
+from inventory import InventoryManager
+
+# Voids and returns (kind, ref), basket lines (txn) and discounts (discount_cents, promo) keep their
+# fields, so the exported ledger can be audited; a field a record does not have is left empty
+SALE_COLUMNS = ["product", "quantity", "revenue_cents", "profit_cents", "day", "kind", "ref", "txn",
+                "discount_cents", "promo"]
+DEFAULT_CHUNK = 10000  # Sales encoded and written per chunk; also the checkpoint interval
+
+
+# ---------------------------
+# Chunk encoders: a list of sale records -> bytes
+# ---------------------------
+def encode_csv(sales):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for sale in sales:
+        writer.writerow([sale.get(column, "") for column in SALE_COLUMNS])
+    return buffer.getvalue().encode("utf-8")
+
+
+def encode_jsonl(sales):
+    return "".join(json.dumps(sale, ensure_ascii=False) + "\n" for sale in sales).encode("utf-8")
+
+
+ENCODERS = {"csv": encode_csv, "jsonl": encode_jsonl}
+
+
+def filter_days(sales, start_day=None, end_day=None):
+    # Sales are stored in day order, so the scan stops at the first sale after end_day
+    for sale in sales:
+        day = sale["day"]
+        if end_day is not None and day > end_day:
+            return
+        if start_day is None or day >= start_day:
+            yield sale
+
+
+def read_progress(progress_file):
+    if os.path.exists(progress_file):
+        with open(progress_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+def write_progress(progress_file, progress):
+    temp_file = progress_file + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(progress, f)
+    os.replace(temp_file, progress_file)
+
+
+# ---------------------------
+# export_sales: stream a sales ledger to CSV or JSONL in constant memory
+# ---------------------------
+def export_sales(sales, path, fmt="csv", compress=False, start_day=None, end_day=None,
+                 chunk_size=DEFAULT_CHUNK, resume=False):
+    # `sales` is any iterable of sale records in day order (a file stream, a storage backend, a list).
+    # Progress is checkpointed next to the output after every chunk; with resume=True an interrupted
+    # export continues from the last checkpoint instead of starting over.
+    encode = ENCODERS[fmt]
+    options = {"format": fmt, "gzip": compress, "start_day": start_day, "end_day": end_day}
+    progress_file = path + ".progress"
+    progress = read_progress(progress_file) if resume else None
+    if progress is not None and progress["options"] != options:
+        raise ValueError("The unfinished export used different options; export again without resume")
+    if progress is not None and (not os.path.exists(path) or os.path.getsize(path) < progress["bytes"]):
+        print(f"{path} is missing or shorter than its last checkpoint; starting the export over")
+        progress = None
+
+    sales = filter_days(sales, start_day, end_day)
+    if progress is None:
+        progress = {"options": options, "written": 0, "bytes": 0}
+        mode = "wb"
+    else:
+        # Drop anything written after the last checkpoint, then skip the sales already exported
+        with open(path, "r+b") as f:
+            f.truncate(progress["bytes"])
+        sales = itertools.islice(sales, progress["written"], None)
+        mode = "ab"
+
+    with open(path, mode) as out:
+        if mode == "wb" and fmt == "csv":
+            header = (",".join(SALE_COLUMNS) + "\r\n").encode("utf-8")
+            out.write(gzip.compress(header) if compress else header)
+        while True:
+            chunk = list(itertools.islice(sales, chunk_size))
+            if not chunk:
+                break
+            data = encode(chunk)
+            # Each chunk is its own gzip member, so the file is valid gzip at every checkpoint
+            out.write(gzip.compress(data) if compress else data)
+            out.flush()
+            progress["written"] += len(chunk)
+            progress["bytes"] = out.tell()
+            write_progress(progress_file, progress)
+
+    if os.path.exists(progress_file):
+        os.remove(progress_file)
+    return progress["written"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the sales ledger as CSV or JSON Lines")
+    parser.add_argument("out", help="Output file")
+    parser.add_argument("--data-dir", default=".", help="Directory with the inventory data files")
+    parser.add_argument("--format", choices=sorted(ENCODERS), default="csv")
+    parser.add_argument("--gzip", action="store_true", help="Compress the output with gzip")
+    parser.add_argument("--start-day", type=int, help="First day to export")
+    parser.add_argument("--end-day", type=int, help="Last day to export")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK)
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted export")
+    parser.add_argument("--store", help="Export the sales of one store of a multi-store setup")
+    args = parser.parse_args(argv)
+
+    manager = InventoryManager(args.data_dir, load_history=False, store=args.store, read_only=True)
+    # Only the segments that overlap the day range are read
+    written = export_sales(manager.iter_sales(args.start_day, args.end_day), args.out, args.format, args.gzip,
+                           args.start_day, args.end_day, args.chunk_size, args.resume)
+    print(f"Exported {written} sales to {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import numpy as np
+
+
+# ---------------------------
+# Demand forecasting: vectorized across all products
+# ---------------------------
+DEFAULT_WINDOW = 7  # Number of completed days used for the forecast
+DEFAULT_ALPHA = 0.3  # Smoothing factor for exponential smoothing
+DEFAULT_LEAD_TIME = 2  # Days between placing a restock order and receiving it
+DEFAULT_SERVICE_Z = 1.65  # Safety stock factor (about 95% service level)
+
+
+def daily_quantity_matrix(product_by_day, names, first_day, last_day):
+    # Returns an array of shape (len(names), days) with the quantity sold per product per day.
+    # product_by_day is SalesAggregates.product_by_day: product name -> {day: quantity}
+    n_days = max(last_day - first_day + 1, 0)
+    matrix = np.zeros((len(names), n_days))
+    if n_days == 0:
+        return matrix
+    days = range(first_day, last_day + 1)
+    for row, name in enumerate(names):
+        by_day = product_by_day.get(name)
+        if by_day:
+            matrix[row] = [by_day.get(day, 0) for day in days]
+    return matrix
+
+
+def moving_average(matrix, window=DEFAULT_WINDOW):
+    # Mean daily demand over the last `window` days for every product
+    if matrix.shape[1] == 0:
+        return np.zeros(matrix.shape[0])
+    return matrix[:, -window:].mean(axis=1)
+
+
+def exponential_smoothing(matrix, alpha=DEFAULT_ALPHA):
+    # Simple exponential smoothing, written as one weighted sum so it runs as a single matrix product
+    n_days = matrix.shape[1]
+    if n_days == 0:
+        return np.zeros(matrix.shape[0])
+    weights = alpha * (1 - alpha) ** np.arange(n_days - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (n_days - 1)  # The first observation seeds the level
+    return matrix @ weights
+
+
+def reorder_points(demand, std, lead_time, z=DEFAULT_SERVICE_Z):
+    # Stock needed to cover demand during the lead time plus safety stock
+    lead_time = np.asarray(lead_time, dtype=float)
+    points = demand * lead_time + z * std * np.sqrt(lead_time)
+    return np.ceil(points).astype(int)
+
+
+def forecast_products(products, product_by_day, current_day, method="ema", window=DEFAULT_WINDOW, alpha=DEFAULT_ALPHA):
+    # Returns (demand, reorder_point) arrays aligned with `products`, based on completed days only
+    names = [p["name"] for p in products]
+    last_day = current_day - 1
+    first_day = max(1, last_day - window + 1)
+    matrix = daily_quantity_matrix(product_by_day, names, first_day, last_day)
+    if method == "ema":
+        demand = exponential_smoothing(matrix, alpha)
+    else:
+        demand = moving_average(matrix, window)
+    std = matrix.std(axis=1) if matrix.shape[1] else np.zeros(len(names))
+    lead_times = [p["lead_time"] for p in products]
+    return demand, reorder_points(demand, std, lead_times)
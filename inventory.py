@@ -0,0 +1,643 @@
+import os
+import time
+
+import codec
+import metrics
+import oplog
+import stores
+from aggregates import SalesAggregates
+from events import EventBus
+from forecast import forecast_products
+from money import format_cents
+from oplog import OperationLog
+from parallel import default_executor
+from partitions import PartitionedSalesStore
+from price_history import HISTORY_FILE, PriceHistory
+from pricing import RULES_FILE, PricingEngine, load_rules, save_rules
+
+
+SALES_RECORDED = metrics.counter("inventory_sales_total", "Sale records added, adjustments included")
+RECORD_SALE_SECONDS = metrics.histogram("inventory_record_sale_seconds", "Time to record one sale")
+RECORD_TRANSACTION_SECONDS = metrics.histogram("inventory_record_transaction_seconds",
+                                               "Time to record one basket transaction")
+SAVE_PRODUCTS_SECONDS = metrics.histogram("inventory_save_products_seconds", "Time to write product or stock data")
+SAVE_PRODUCTS_BYTES = metrics.counter("inventory_save_products_bytes_total", "Bytes of product data written")
+LOAD_SECONDS = metrics.gauge("inventory_load_seconds", "Time the last InventoryManager took to load its data")
+
+
+def prorate(cents, done, quantity, total):
+    # Share of `cents` for `quantity` more units out of `total`, after `done` units were already counted
+    return cents * (done + quantity) // total - cents * done // total
+
+
+# ---------------------------
+# InventoryManager: Data management class
+# ---------------------------
+class InventoryManager:
+    def __init__(self, data_dir=".", load_history=True, store=None, read_only=False):
+        # load_history=False skips reading every sale into memory; headless tools stream them instead.
+        # read_only=True loads without changing anything on disk (no migration, compaction, seeded price
+        # history or log snapshot), for tools that only read; nothing should be saved from such a manager.
+        # With a store name, stock and sales come from that store's shard and definitions are shared.
+        # Each product: {name, quantity, price_cents, cost_cents, restock_threshold, lead_time, auto_restock, sku}
+        self.products = []
+        self.sku_index = {}  # SKU / barcode -> product index, so a scan resolves in O(1)
+        self.name_index = {}  # Product name -> product index
+        # Each sale: {product, quantity, revenue_cents, profit_cents, day}; adjustments add kind and ref
+        self.sales = []
+        self.returned = {}  # Ledger position of a sale -> quantity already voided or returned
+        self.next_txn = 1  # Id for the next basket transaction
+        self.total_revenue_cents = 0  # Money is kept in integer cents (see money.py)
+        self.total_profit_cents = 0
+        self.aggregates = SalesAggregates()  # Per-day series and per-product totals, kept up to date by record_sale
+        self.events = EventBus()  # Sales, stock changes, alerts and new days, for live listeners
+        self.data_dir = data_dir
+        self.store = store
+        self.data_file = os.path.join(data_dir, "products.json")
+        self.time_file = os.path.join(data_dir, "time.json")
+        self.rules_file = os.path.join(data_dir, RULES_FILE)  # Pricing rules are shared by every store
+        self.store_lock = None
+        self.definitions_base = {}  # Shared definitions as last loaded or saved, by name (stores only)
+        if store is None:
+            self.stock_file = None  # Single location: stock lives in products.json
+            location = data_dir
+        else:
+            location = stores.store_dir(data_dir, store)
+            self.stock_file = os.path.join(location, "stock.json")
+            if not read_only:
+                os.makedirs(location, exist_ok=True)
+                self.store_lock = stores.hold_store(location)  # Keeps renames from other stores out while open
+        # Sales are kept in day-range segment files; an old single sales.json is split up on first use
+        self.sales_store = PartitionedSalesStore(location, read_only=read_only)
+        self.current_day = 1
+        self.forecast = {}  # product name -> (daily demand, reorder point)
+        self.pricing = PricingEngine()  # Discounts and promotions, compiled for the current day
+        # Price and cost versions by effective day, shared like the product definitions
+        self.price_history = PriceHistory(os.path.join(data_dir, HISTORY_FILE))
+        self.load_errors = []  # Bad records skipped while loading, with file and line
+        started = time.perf_counter()
+        self.load_time()
+        if not read_only:
+            self.sales_store.close_before(self.current_day)
+            self.sales_store.compact()  # Closed segments left uncompacted (e.g. by an older version) move to cold storage
+        self.load_products()
+        self.index_products()
+        self.price_history.load()
+        if self.price_history.seed(self.products, self.current_day) and not read_only:
+            self.price_history.save()
+        self.load_pricing()
+        if load_history:
+            self.load_sales()
+        self.calculate_totals()
+        self.update_forecast()
+        LOAD_SECONDS.set(time.perf_counter() - started)
+        # Every change is logged so it can be undone, audited, or replayed from the snapshot
+        self.oplog = OperationLog(location)
+        if not self.oplog.has_snapshot() and not read_only:
+            self.oplog.snapshot(self.products, self.current_day)
+
+    def close(self):
+        # Lets other stores rename products in this store's files again (also done when the process exits)
+        if self.store_lock is not None:
+            self.store_lock.close()
+            self.store_lock = None
+
+    def load_time(self):
+        if os.path.exists(self.time_file):
+            try:
+                with open(self.time_file, "rb") as f:
+                    data = codec.decode(f.read())
+                    self.current_day = data.get("current_day", 1)
+            except Exception as e:
+                print("Failed to load time:", e)
+        else:
+            self.current_day = 1
+
+    def save_time(self):
+        try:
+            with open(self.time_file, "wb") as f:
+                f.write(codec.encode({"current_day": self.current_day}))
+            print("Time saved!")
+        except Exception as e:
+            print("Failed to save time:", e)
+
+    def advance_day(self):
+        self.set_day(self.current_day + 1)
+        self.oplog.record("advance_day", day=self.current_day)
+
+    def set_day(self, day):
+        self.current_day = day
+        self.save_time()
+        self.sales_store.close_before(self.current_day)  # Segments that ended yesterday become read-only
+        self.sales_store.compact()  # ...and move to compressed columnar cold storage
+        self.pricing.compile(self.current_day)  # Promotions starting or ending today
+        self.update_forecast()
+        self.events.publish("day", day=self.current_day)
+
+    def load_pricing(self):
+        try:
+            rules, errors = load_rules(self.rules_file)
+            self.report_load_errors(errors)
+            self.pricing.set_rules(rules)
+        except Exception as e:
+            print("Failed to load pricing rules:", e)
+        self.pricing.compile(self.current_day)
+
+    def save_pricing(self):
+        try:
+            save_rules(self.rules_file, self.pricing.rules)
+            print("Pricing rules saved!")
+        except Exception as e:
+            print("Failed to save pricing rules:", e)
+
+    def price_sale(self, product, quantity):
+        # A sale record for quantity of product at today's prices; a discount is recorded with the rule giving it
+        revenue, discount, promo = self.pricing.quote(product, quantity)
+        sale_record = {
+            "product": product["name"],
+            "quantity": quantity,
+            "revenue_cents": revenue,
+            "profit_cents": revenue - quantity * product["cost_cents"],
+            "day": self.current_day
+        }
+        if discount:
+            sale_record["discount_cents"] = discount
+            sale_record["promo"] = promo
+        return sale_record
+
+    def load_products(self):
+        if os.path.exists(self.data_file):
+            try:
+                with open(self.data_file, "rb") as f:
+                    self.products, errors = codec.load_records(f.read(), "product", self.data_file)
+                self.report_load_errors(errors)
+                print("Product data loaded!")
+            except Exception as e:
+                print("Failed to load product data:", e)
+        if self.stock_file is not None:
+            self.definitions_base = {d["name"]: d for d in self.definitions()}
+            try:
+                stock = stores.load_stock(self.stock_file)
+                for product in self.products:
+                    product["quantity"] = stock.get(product["name"], 0)
+            except Exception as e:
+                print("Failed to load store stock:", e)
+
+    def save_products(self):
+        # Saves stock levels. In a store only the store's own stock file is written.
+        if self.stock_file is not None:
+            try:
+                with SAVE_PRODUCTS_SECONDS.time():
+                    stores.save_stock(self.stock_file, {p["name"]: p["quantity"] for p in self.products})
+                print("Store stock saved!")
+            except Exception as e:
+                print("Failed to save store stock:", e)
+            return
+        try:
+            with SAVE_PRODUCTS_SECONDS.time():
+                data = codec.encode(self.products)
+                with open(self.data_file, "wb") as f:
+                    f.write(data)
+            SAVE_PRODUCTS_BYTES.inc(len(data))
+            print("Product data saved!")
+        except Exception as e:
+            print("Failed to save product data:", e)
+
+    def definitions(self, products=None):
+        # Product definitions without the stock, as shared between stores
+        if products is None:
+            products = self.products
+        return [{k: v for k, v in p.items() if k != "quantity"} for p in products]
+
+    def save_definitions(self):
+        # Saves product definitions; in a store these are shared, so they are written without stock.
+        # Other stores may have changed the file since it was loaded, so it is re-read and merged under a lock.
+        if self.stock_file is None:
+            self.save_products()
+            return
+        try:
+            definitions = self.definitions()
+            with stores.definitions_lock(self.data_dir):
+                disk = []
+                if os.path.exists(self.data_file):
+                    with open(self.data_file, "rb") as f:
+                        disk, _ = codec.load_records(f.read(), "product", self.data_file)
+                merged = stores.merge_definitions(self.definitions(disk), self.definitions_base, definitions)
+                temp_file = self.data_file + ".tmp"
+                with open(temp_file, "wb") as f:
+                    f.write(codec.encode(merged))
+                os.replace(temp_file, self.data_file)
+            self.definitions_base = {d["name"]: d for d in definitions}
+            print("Product definitions saved!")
+        except Exception as e:
+            print("Failed to save product definitions:", e)
+
+    def load_sales(self):
+        try:
+            self.sales, errors = self.sales_store.load_all()
+            self.report_load_errors(errors)
+            self.returned = {}
+            for sale in self.sales:
+                if "ref" in sale:
+                    self.returned[sale["ref"]] = self.returned.get(sale["ref"], 0) - sale["quantity"]
+                if "txn" in sale and sale["txn"] >= self.next_txn:
+                    self.next_txn = sale["txn"] + 1
+            print("Sales records loaded!")
+        except Exception as e:
+            print("Failed to load sales records:", e)
+
+    def save_sales(self):
+        # Rewrites all sales segments; only needed when existing records change
+        try:
+            self.sales_store.rewrite(self.sales)
+            self.sales_store.close_before(self.current_day)
+            self.sales_store.compact()
+            print("Sales records saved!")
+        except Exception as e:
+            print("Failed to save sales records:", e)
+
+    def append_sales(self, sales):
+        # Persists new sales by appending to the open segment only
+        try:
+            self.sales_store.append(sales)
+            print("Sales records saved!")
+        except Exception as e:
+            print("Failed to save sales records:", e)
+
+    def iter_sales(self, start_day=None, end_day=None):
+        # Streams sale records segment by segment, skipping segments outside the day range
+        return self.sales_store.iter_sales(start_day, end_day)
+
+    def aggregate_range(self, start_day=None, end_day=None):
+        # Aggregates for a day range, computed from the matching segments only, in parallel
+        paths = self.sales_store.segment_paths(start_day, end_day)
+        return default_executor().aggregate_files(paths, start_day, end_day)
+
+    def report_load_errors(self, errors):
+        for error in errors:
+            print("Skipped invalid record:", error)
+        self.load_errors.extend(errors)
+
+    def calculate_totals(self):
+        # Recalculate total revenue, profit and the per-day aggregates based on loaded sales
+        self.aggregates = SalesAggregates()
+        self.aggregates.add_sales(self.sales)
+        self.total_revenue_cents = self.aggregates.total_revenue_cents
+        self.total_profit_cents = self.aggregates.total_profit_cents
+
+    def update_forecast(self):
+        # Recompute demand and reorder points for every product in one vectorized pass
+        demand, points = forecast_products(self.products, self.aggregates.product_by_day, self.current_day)
+        self.forecast = {
+            product["name"]: (float(demand[i]), int(points[i]))
+            for i, product in enumerate(self.products)
+        }
+
+    def get_reorder_point(self, product):
+        return self.forecast.get(product["name"], (0.0, 0))[1]
+
+    def get_restock_threshold(self, product):
+        # Products with automatic restocking use the forecast reorder point instead of the manual threshold
+        if product["auto_restock"]:
+            return self.get_reorder_point(product)
+        return product["restock_threshold"]
+
+    def index_products(self):
+        self.sku_index = {p["sku"]: i for i, p in enumerate(self.products) if p["sku"]}
+        self.name_index = {p["name"]: i for i, p in enumerate(self.products)}
+
+    def find_by_name(self, name):
+        # Index of the product with this name, or -1
+        return self.name_index.get(name, -1)
+
+    def find_by_sku(self, sku):
+        # Index of the product with this SKU / barcode, or -1
+        return self.sku_index.get(sku, -1)
+
+    def check_sku(self, product, index=None):
+        owner = self.sku_index.get(product["sku"], index) if product["sku"] else index
+        if owner != index:
+            raise codec.ValidationError(f"SKU {product['sku']} is already used by {self.products[owner]['name']}")
+
+    def add_product(self, product):
+        codec.validate(product, "product")  # Raises codec.ValidationError for a malformed product
+        self.check_sku(product)
+        self.insert_product(len(self.products), product)
+        self.oplog.record("add", index=len(self.products) - 1, after=dict(product))
+
+    def insert_product(self, index, product):
+        self.products.insert(index, product)
+        self.aggregates.track_product(product["name"])
+        self.record_price(product)
+        self.save_product_changes()
+        self.events.publish("stock", product=product["name"], quantity=product["quantity"])
+
+    def remove_product(self, index):
+        product = self.products.pop(index)
+        self.aggregates.untrack_product(product["name"])
+        self.save_product_changes()
+        self.events.publish("product_removed", product=product["name"])
+
+    def save_product_changes(self):
+        self.index_products()
+        self.save_definitions()
+        if self.stock_file is not None:
+            self.save_products()
+        self.update_forecast()
+
+    def edit_product(self, index, new_product):
+        if 0 <= index < len(self.products):
+            codec.validate(new_product, "product")
+            self.check_sku(new_product, index)
+            self.check_rename(self.products[index]["name"], new_product["name"])
+            before = dict(self.products[index])  # Copied, since sales change the quantity in place
+            self.replace_product(index, new_product)
+            self.oplog.record("edit", index=index, before=before, after=dict(new_product))
+
+    def check_rename(self, old_name, new_name):
+        # A rename rewrites the sales segments; refused (partitions.SegmentError) while any of them
+        # cannot be read cleanly, since the rewrite would lose the records that did not load.
+        # In a store it also rewrites the other stores, so it waits until they are all closed
+        # (stores.StoreInUseError).
+        if old_name != new_name:
+            self.sales_store.check_segments()
+            if self.store is not None:
+                with stores.other_stores_closed(self.data_dir, skip_store=self.store):
+                    pass
+
+    def replace_product(self, index, new_product):
+        if 0 <= index < len(self.products):
+            old_product = self.products[index]
+            old_name = old_product["name"]
+            self.products[index] = new_product
+            # If the product name has changed, update the product name in all sales records
+            if old_name != new_product["name"]:
+                for sale in self.sales:
+                    if sale["product"] == old_name:
+                        sale["product"] = new_product["name"]
+                self.aggregates.rename_product(old_name, new_product["name"])
+                self.aggregates.untrack_product(old_name)
+                self.aggregates.track_product(new_product["name"])
+                if self.pricing.rename_product(old_name, new_product["name"]):
+                    self.save_pricing()
+                self.price_history.rename(old_name, new_product["name"])
+                self.save_sales()  # Keep updated sales records
+                if self.store is not None:
+                    try:
+                        stores.rename_product(self.data_dir, old_name, new_product["name"], skip_store=self.store)
+                    except Exception as e:
+                        print("Failed to rename the product in the other stores:", e)
+            self.record_price(new_product, renamed=old_name != new_product["name"])
+            self.save_product_changes()
+            if old_name != new_product["name"]:
+                self.events.publish("product_removed", product=old_name)
+            self.events.publish("stock", product=new_product["name"], quantity=new_product["quantity"])
+
+    def record_price(self, product, renamed=False):
+        # A price or cost change takes effect from the current day; earlier days keep their versions
+        if self.price_history.record(product, self.current_day) or renamed:
+            self.price_history.save()
+
+    def record_sale(self, product_index, quantity):
+        with RECORD_SALE_SECONDS.time():
+            return self.record_sale_timed(product_index, quantity)
+
+    def record_sale_timed(self, product_index, quantity):
+        if 0 <= product_index < len(self.products):
+            product = self.products[product_index]
+            if quantity > product["quantity"]:
+                return False, "Insufficient stock!"
+            sale_record = self.price_sale(product, quantity)
+            self.apply_sale(product_index, sale_record)
+            self.oplog.record("sale", index=product_index, sale=sale_record)
+            return True, "Sale recorded successfully!"
+        else:
+            return False, "Invalid product index!"
+
+    def record_transaction(self, lines):
+        with RECORD_TRANSACTION_SECONDS.time():
+            return self.record_transaction_timed(lines)
+
+    def record_transaction_timed(self, lines):
+        # A basket: lines of (product_index, quantity). Stock is checked for every line before anything
+        # changes; the lines become sale records sharing one txn id and are persisted in one write.
+        # Lines of the same product are merged first and quoted together, so buy-x-get-y and tier rules
+        # see the product's whole quantity in the basket.
+        if not lines:
+            return False, "The basket is empty!"
+        wanted = {}
+        for product_index, quantity in lines:
+            if not 0 <= product_index < len(self.products):
+                return False, "Invalid product index!"
+            if quantity <= 0:
+                return False, "Invalid quantity!"
+            wanted[product_index] = wanted.get(product_index, 0) + quantity
+        short = [self.products[i]["name"] for i, quantity in wanted.items() if quantity > self.products[i]["quantity"]]
+        if short:
+            return False, "Insufficient stock: " + ", ".join(short)
+        txn = self.next_txn
+        self.next_txn += 1
+        records = []
+        for product_index, quantity in wanted.items():
+            sale_record = self.price_sale(self.products[product_index], quantity)
+            sale_record["txn"] = txn
+            records.append((product_index, sale_record))
+        self.apply_sales(records)
+        self.oplog.record("transaction", lines=records)
+        total = sum(sale["revenue_cents"] for _, sale in records)
+        return True, f"Transaction #{txn} recorded: {len(records)} lines, total {format_cents(total)}"
+
+    def return_sale(self, sale_index, quantity=None, kind="return"):
+        # Voids or returns part of an earlier sale (all that is left of it without a quantity). The ledger
+        # keeps the original and gets a negative adjustment record, stock is put back, and totals, per-day
+        # series and rankings are corrected through the same incremental path as a sale.
+        if not 0 <= sale_index < len(self.sales):
+            return False, "Invalid sale index!"
+        sale = self.sales[sale_index]
+        if "ref" in sale:
+            return False, "A void or return cannot itself be reversed; use Undo instead"
+        remaining = sale["quantity"] - self.returned.get(sale_index, 0)
+        if kind == "void" or quantity is None:
+            quantity = remaining
+        if remaining <= 0:
+            return False, "This sale has already been fully voided or returned"
+        if not 0 < quantity <= remaining:
+            return False, f"Only {remaining} units of this sale can be returned"
+        product_index = next((i for i, p in enumerate(self.products) if p["name"] == sale["product"]), None)
+        if product_index is None:
+            return False, f"Product {sale['product']} no longer exists"
+        # Refunds are prorated on the cumulative quantity returned, so a sale returned in several parts
+        # is refunded exactly its original amount
+        returned = sale["quantity"] - remaining
+        adjustment = {
+            "product": sale["product"],
+            "quantity": -quantity,
+            "revenue_cents": -prorate(sale["revenue_cents"], returned, quantity, sale["quantity"]),
+            "profit_cents": -prorate(sale["profit_cents"], returned, quantity, sale["quantity"]),
+            "day": self.current_day,
+            "kind": kind,
+            "ref": sale_index
+        }
+        self.apply_sale(product_index, adjustment)
+        self.oplog.record("sale", index=product_index, sale=adjustment)
+        return True, f"{kind.capitalize()} of {quantity} x {sale['product']} recorded"
+
+    def apply_sale(self, product_index, sale_record):
+        self.apply_sales([(product_index, sale_record)])
+
+    def apply_sales(self, records):
+        # records: [(product_index, sale record)]; stock and sales are each saved once for the batch
+        for product_index, sale_record in records:
+            self.products[product_index]["quantity"] -= sale_record["quantity"]
+            self.total_revenue_cents += sale_record["revenue_cents"]
+            self.total_profit_cents += sale_record["profit_cents"]
+            self.sales.append(sale_record)
+            self.aggregates.add_sale(sale_record)
+            if "ref" in sale_record:
+                self.returned[sale_record["ref"]] = self.returned.get(sale_record["ref"], 0) - sale_record["quantity"]
+        SALES_RECORDED.inc(len(records))
+        self.save_products()  # Update inventory
+        self.append_sales([sale_record for _, sale_record in records])  # Persist sales records
+        if self.events.subscribers:
+            self.publish_sales("sale", records)
+
+    def publish_sales(self, kind, records):
+        # Sale events, then the new stock of each product touched; a sale that takes stock below its
+        # restock threshold also raises an alert
+        sold = {}
+        for product_index, sale_record in records:
+            self.events.publish(kind, sale=sale_record)
+            sold[product_index] = sold.get(product_index, 0) + sale_record["quantity"]
+        for product_index, quantity in sold.items():
+            product = self.products[product_index]
+            self.events.publish("stock", product=product["name"], quantity=product["quantity"])
+            threshold = self.get_restock_threshold(product)
+            if kind == "sale" and product["quantity"] < threshold <= product["quantity"] + quantity:
+                self.events.publish("alert", product=product["name"], quantity=product["quantity"],
+                                    threshold=threshold)
+
+    def revert_sale(self, product_index, sale_record):
+        self.revert_sales([(product_index, sale_record)])
+
+    def revert_sales(self, records):
+        # Puts the stock back and removes the records from memory, the aggregates and their segment files
+        for product_index, sale_record in reversed(records):
+            self.products[product_index]["quantity"] += sale_record["quantity"]
+            self.total_revenue_cents -= sale_record["revenue_cents"]
+            self.total_profit_cents -= sale_record["profit_cents"]
+            for i in range(len(self.sales) - 1, -1, -1):
+                if self.sales[i] == sale_record:
+                    del self.sales[i]
+                    break
+            self.aggregates.remove_sale(sale_record)
+            if "ref" in sale_record:
+                self.returned[sale_record["ref"]] += sale_record["quantity"]
+                if not self.returned[sale_record["ref"]]:
+                    del self.returned[sale_record["ref"]]
+        self.save_products()
+        try:
+            self.sales_store.remove([sale_record for _, sale_record in records])
+        except Exception as e:
+            print("Failed to remove sales records:", e)
+        if self.events.subscribers:
+            self.publish_sales("sale_undone", records)
+
+    # ---------------------------
+    # Undo / redo through the operation log
+    # ---------------------------
+    def undo(self):
+        event = self.oplog.next_undo()
+        if event is None:
+            return False, "Nothing to undo"
+        if event["op"] == "edit":
+            try:
+                self.check_rename(event["after"]["name"], event["before"]["name"])
+            except ValueError as e:
+                return False, str(e)
+        self.oplog.undo()
+        op = event["op"]
+        if op == "add":
+            self.remove_product(event["index"])
+        elif op == "edit":
+            self.replace_product(event["index"], dict(event["before"]))
+        elif op == "sale":
+            self.revert_sale(event["index"], event["sale"])
+        elif op == "transaction":
+            self.revert_sales(event["lines"])
+        elif op == "advance_day":
+            self.set_day(event["day"] - 1)
+        return True, f"Undone: {oplog.describe(event)}"
+
+    def redo(self):
+        event = self.oplog.next_redo()
+        if event is None:
+            return False, "Nothing to redo"
+        if event["op"] == "edit":
+            try:
+                self.check_rename(event["before"]["name"], event["after"]["name"])
+            except ValueError as e:
+                return False, str(e)
+        self.oplog.redo()
+        op = event["op"]
+        if op == "add":
+            self.insert_product(event["index"], dict(event["after"]))
+        elif op == "edit":
+            self.replace_product(event["index"], dict(event["after"]))
+        elif op == "sale":
+            self.apply_sale(event["index"], event["sale"])
+        elif op == "transaction":
+            self.apply_sales(event["lines"])
+        elif op == "advance_day":
+            self.set_day(event["day"])
+        return True, f"Redone: {oplog.describe(event)}"
+
+    def get_sales_summary(self, aggregates=None):
+        # Returns a dictionary: product name -> total quantity sold (0 if no sale)
+        if aggregates is None:
+            aggregates = self.aggregates
+        summary = {}
+        for product in self.products:
+            summary[product["name"]] = 0
+        summary.update(aggregates.quantity_by_product)
+        return summary
+
+    def get_best_selling(self, aggregates=None):
+        if aggregates is None:
+            aggregates = self.aggregates
+        return aggregates.get_ranking(self.products).best()
+
+    def get_worst_selling(self, aggregates=None):
+        if aggregates is None:
+            aggregates = self.aggregates
+        return aggregates.get_ranking(self.products).worst()
+
+    def get_pareto_class(self, product, metric="revenue", aggregates=None):
+        # "A", "B" or "C" by the product's share of revenue or profit
+        if aggregates is None:
+            aggregates = self.aggregates
+        return aggregates.get_pareto(metric, self.products).get(product["name"])
+
+    def products_in_class(self, classes, metric="revenue", aggregates=None, products=None):
+        # The products whose ABC class is in `classes` (e.g. "A" or "AB"), for narrowing analytics
+        if aggregates is None:
+            aggregates = self.aggregates
+        if products is None:
+            products = self.products
+        classifier = aggregates.get_pareto(metric, products)
+        return [p for p in products if classifier.get(p["name"]) in classes]
+
+    def get_chain_view(self, start_day=None, end_day=None):
+        # Aggregates across every store (optionally for a day range), with the products' quantity
+        # replaced by chain-wide stock
+        aggregates, stock = stores.aggregate_stores(self.data_dir, start_day=start_day, end_day=end_day)
+        products = [dict(p, quantity=stock.get(p["name"], 0)) for p in self.products]
+        return aggregates, products
+
+    def check_restock(self):
+        # Returns a list of product names that are below threshold
+        alerts = []
+        for product in self.products:
+            threshold = self.get_restock_threshold(product)
+            if product["quantity"] < threshold:
+                alerts.append(product["name"])
+        return alerts
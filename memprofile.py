@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+SAMPLE = 2000  # Elements of a large list measured one by one; the rest are extrapolated
+TRACE_FRAMES = 1
+TOP_FILES = 8  # Biggest allocating source files listed in each report
+SNAPSHOT_INTERVAL = 30  # Seconds between tracemalloc breakdowns; grouping a snapshot takes a second or two
+
+
+# ---------------------------
+# Size estimates: deep size of Python structures, with numpy arrays counted by their buffers.
+# Objects already seen (shared strings, keys, cached ints) are counted once.
+# ---------------------------
+def deep_size(obj, seen=None):
+    if seen is None:
+        seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            total += item.nbytes + sys.getsizeof(item) if item.base is None else sys.getsizeof(item)
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__") and not isinstance(item, type):
+            stack.append(item.__dict__)
+    return total
+
+
+def estimate_size(obj):
+    # deep_size, but a long list is measured on a random sample of its elements and scaled up
+    if isinstance(obj, list) and len(obj) > SAMPLE:
+        seen = set()
+        sample = random.Random(0).sample(range(len(obj)), SAMPLE)
+        measured = sum(deep_size(obj[i], seen) for i in sample)
+        return sys.getsizeof(obj) + measured * len(obj) // SAMPLE
+    return deep_size(obj)
+
+
+def manager_sizes(manager):
+    # Estimated bytes of each of InventoryManager's in-memory structures
+    return {
+        "sales records": estimate_size(manager.sales),
+        "products": estimate_size(manager.products),
+        "aggregates": deep_size(manager.aggregates),
+        "price history": deep_size(manager.price_history.versions),
+        "pricing rules": deep_size(manager.pricing),
+        "forecast": deep_size(manager.forecast),
+    }
+
+
+def window_sizes(window):
+    # Structures held by the Qt window; Qt's own objects are estimated per item, matplotlib by its data
+    sizes = {
+        "sales table index": deep_size(window.sales_model.sales_index) + window.sales_model.rows.nbytes,
+        "product picker index": deep_size(window.combo_products.name_index),
+        "valuation panel": deep_size(window.valuation_model.columns) + deep_size(window.valuation_model.sold),
+        "chart data": deep_size(list(window.charts.full_data.values())),
+    }
+    # QTableWidgetItems live in C++; about 200 bytes each with their text
+    items = sum(table.rowCount() * table.columnCount() for table in (window.table_products, window.table_basket))
+    sizes["table items (est.)"] = items * 200
+    sizes["chart artists"] = sum(len(line.get_xdata()) * 16 for line in window.charts.figure.findobj(
+        lambda artist: hasattr(artist, "get_xdata")))
+    return sizes
+
+
+def rss_bytes():
+    # Resident set size now (Linux), or the peak so far where /proc is not available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return 0
+
+
+def subsystem(filename):
+    # Groups tracemalloc's per-file statistics into the parts of the program
+    path = filename.replace("\\", "/")
+    if path.startswith("<frozen"):
+        return "code (imports)"
+    for marker, name in (("/matplotlib/", "matplotlib"), ("/PyQt5/", "qt"), ("/numpy/", "numpy"),
+                         ("/json/", "decoding"), ("/msgspec/", "decoding"), ("/orjson", "decoding")):
+        if marker in path:
+            return name
+    base = os.path.basename(path)
+    if base in ("codec.py", "partitions.py", "columnar.py", "inventory.py", "oplog.py", "storage.py"):
+        return "data"
+    if base in ("aggregates.py", "forecast.py", "pareto.py", "valuation.py", "price_history.py", "pricing.py"):
+        return "analytics"
+    if base in ("Final.py", "charts.py", "sales_table.py", "product_picker.py", "decimate.py"):
+        return "gui"
+    return "other"
+
+
+# ---------------------------
+# MemoryProfiler: tracemalloc snapshots plus the structure estimates, reported at startup and after
+# every refresh; each report is also appended as one JSON line so runs can be compared
+# ---------------------------
+class MemoryProfiler:
+    def __init__(self, log_file=None):
+        self.log_file = log_file
+        self.by_file = None  # filename -> bytes at the last breakdown
+        self.last_breakdown = None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+
+    def breakdown(self):
+        # {filename: bytes} of the memory allocated from each source file and still alive
+        stats = tracemalloc.take_snapshot().statistics("filename")
+        return {stat.traceback[0].filename: stat.size for stat in stats}
+
+    def report(self, label, manager=None, window=None):
+        # The structure estimates are always taken; the tracemalloc breakdown at most every SNAPSHOT_INTERVAL
+        started = time.perf_counter()
+        previous = None
+        by_subsystem = {}
+        if self.last_breakdown is None or started - self.last_breakdown >= SNAPSHOT_INTERVAL:
+            previous, self.by_file = self.by_file, self.breakdown()
+            self.last_breakdown = started
+            for filename, size in self.by_file.items():
+                name = subsystem(filename)
+                by_subsystem[name] = by_subsystem.get(name, 0) + size
+        structures = {}
+        if manager is not None:
+            structures.update(manager_sizes(manager))
+        if window is not None:
+            structures.update(window_sizes(window))
+        traced, peak = tracemalloc.get_traced_memory()
+        record = {"label": label, "time": time.time(), "rss": rss_bytes(), "traced": traced, "traced_peak": peak,
+                  "subsystems": by_subsystem, "structures": structures}
+
+        print(f"Memory [{label}]: RSS {mb(record['rss'])}, Python heap {mb(traced)} (peak {mb(peak)})")
+        for name, size in sorted(by_subsystem.items(), key=lambda item: -item[1]):
+            print(f"  {name:<24}{mb(size):>12}")
+        for name, size in sorted(structures.items(), key=lambda item: -item[1]):
+            print(f"  ~ {name:<22}{mb(size):>12}")
+        if previous is not None:
+            changes = {name: size - previous.get(name, 0) for name, size in self.by_file.items()}
+            for name, change in sorted(changes.items(), key=lambda item: -abs(item[1]))[:TOP_FILES]:
+                if change:
+                    print(f"  {change / 2 ** 20:+.2f} MB  {name}")
+        elif by_subsystem:
+            for name, size in sorted(self.by_file.items(), key=lambda item: -item[1])[:TOP_FILES]:
+                print(f"  {mb(size):>10}  {name}")
+        if self.log_file:
+            try:
+                with open(self.log_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except Exception as e:
+                print("Failed to write memory profile:", e)
+        print(f"  (report took {time.perf_counter() - started:.2f}s)")
+        return record
+
+
+def mb(size):
+    return f"{size / 2 ** 20:.2f} MB"
+
+
+def main(argv=None):
+    # Headless run for benchmarks: load the data, report, and fail if over budget
+    parser = argparse.ArgumentParser(description="Report memory use of the loaded inventory by subsystem")
+    parser.add_argument("--data-dir", default=".")
+    parser.add_argument("--store")
+    parser.add_argument("--log", help="Append the report as a JSON line to this file")
+    parser.add_argument("--budget-mb", type=float, help="Exit with status 1 if RSS exceeds this many MB")
+    args = parser.parse_args(argv)
+
+    profiler = MemoryProfiler(args.log)
+    from inventory import InventoryManager
+    manager = InventoryManager(args.data_dir, store=args.store)
+    record = profiler.report("load", manager)
+    if args.budget_mb is not None and record["rss"] > args.budget_mb * 2 ** 20:
+        print(f"RSS {mb(record['rss'])} is over the budget of {args.budget_mb} MB")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency buckets in seconds, from a fraction of a millisecond up to a slow full refresh
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DUMP_INTERVAL = 15  # Seconds between writes of the metrics file
+
+
+# ---------------------------
+# Metrics: each thread updates its own shard without locking; a lock is taken only when a thread
+# first touches a metric (to register its shard) and the shards are summed when metrics are read.
+# ---------------------------
+class ShardedMetric:
+    kind = None
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.local = threading.local()
+        self.shards = []
+        self.shards_lock = threading.Lock()
+
+    def new_shard(self):
+        return [0]
+
+    def shard(self):
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = self.new_shard()
+            with self.shards_lock:
+                self.shards.append(shard)
+            return shard
+
+    def totals(self):
+        # Element-wise sum of the shards
+        with self.shards_lock:
+            shards = list(self.shards)
+        return [sum(values) for values in zip(self.new_shard(), *shards)]
+
+
+class Counter(ShardedMetric):
+    kind = "counter"
+
+    def inc(self, amount=1):
+        self.shard()[0] += amount
+
+    def value(self):
+        return self.totals()[0]
+
+    def samples(self):
+        return [(self.name, self.value())]
+
+
+class Histogram(ShardedMetric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help_text)
+
+    def new_shard(self):
+        # A count per bucket (plus one past the last bound), then the sum and the count of observations
+        return [0] * (len(self.buckets) + 3)
+
+    def observe(self, value):
+        shard = self.shard()
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    def time(self):
+        return Timer(self)
+
+    def samples(self):
+        totals = self.totals()
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, totals):
+            cumulative += count
+            samples.append((f'{self.name}_bucket{{le="{bound}"}}', cumulative))
+        samples.append((f'{self.name}_bucket{{le="+Inf"}}', totals[-1]))
+        samples.append((f"{self.name}_sum", totals[-2]))
+        samples.append((f"{self.name}_count", totals[-1]))
+        return samples
+
+
+class Gauge:
+    # A value that is set (a single assignment, so no shards needed) or read from a function when scraped
+    kind = "gauge"
+
+    def __init__(self, name, help_text, func=None):
+        self.name = name
+        self.help = help_text
+        self.func = func
+        self.current = 0
+
+    def set(self, value):
+        self.current = value
+
+    def value(self):
+        return self.func() if self.func is not None else self.current
+
+    def samples(self):
+        return [(self.name, self.value())]
+
+
+class Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+# ---------------------------
+# Registry: metrics by name; asking again for a name returns the same metric
+# ---------------------------
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _register(name, factory):
+    with _metrics_lock:
+        if name not in _metrics:
+            _metrics[name] = factory()
+        return _metrics[name]
+
+
+def counter(name, help_text):
+    return _register(name, lambda: Counter(name, help_text))
+
+
+def histogram(name, help_text, buckets=DEFAULT_BUCKETS):
+    return _register(name, lambda: Histogram(name, help_text, buckets))
+
+
+def gauge(name, help_text, func=None):
+    metric = _register(name, lambda: Gauge(name, help_text))
+    if func is not None:
+        metric.func = func
+    return metric
+
+
+def exposition():
+    # All metrics in the Prometheus text format
+    with _metrics_lock:
+        metrics = sorted(_metrics.values(), key=lambda m: m.name)
+    lines = []
+    for metric in metrics:
+        try:
+            samples = metric.samples()
+        except Exception as e:
+            print(f"Failed to read metric {metric.name}:", e)
+            continue
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(f"{name} {value}" for name, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------
+# Exposition: a /metrics endpoint, or a file rewritten every DUMP_INTERVAL seconds
+# (e.g. for the node exporter's textfile collector)
+# ---------------------------
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = exposition().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scraped every few seconds; not worth a console line each time
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Metrics at http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def dump_metrics(path):
+    try:
+        temp_file = path + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.write(exposition())
+        os.replace(temp_file, path)
+    except Exception as e:
+        print("Failed to write metrics:", e)
+
+
+def start_metrics_dump(path, interval=DUMP_INTERVAL):
+    def run():
+        while True:
+            dump_metrics(path)
+            time.sleep(interval)
+
+    threading.Thread(target=run, daemon=True).start()
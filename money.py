@@ -0,0 +1,22 @@
+# ---------------------------
+# Money is held as integer cents everywhere (records, aggregates, arrays), so sums are exact.
+# Amounts are converted to and from decimal currency only for input and display.
+# ---------------------------
+CENTS = 100
+
+
+def to_cents(amount):
+    # A decimal amount (e.g. a price typed into a dialog) to whole cents
+    return int(round(amount * CENTS))
+
+
+def from_cents(cents):
+    # Cents to a float amount, for charts and numeric report columns
+    return cents / CENTS
+
+
+def format_cents(cents):
+    # Exact text for display: 123456 -> "1234.56", -5 -> "-0.05"
+    sign = "-" if cents < 0 else ""
+    whole, fraction = divmod(abs(int(cents)), CENTS)
+    return f"{sign}{whole}.{fraction:02d}"
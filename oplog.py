@@ -0,0 +1,239 @@
+import argparse
+import collections
+import os
+import sys
+
+import codec
+
+LOG_FILE = "oplog.jsonl"
+SNAPSHOT_FILE = "snapshot.json"
+UNDO_LIMIT = 200  # Operations that can be undone in one session
+
+
+# ---------------------------
+# Events: one JSON line per operation, with what is needed to apply and revert it
+#   {"seq", "op": "add", "index", "after": product}
+#   {"seq", "op": "edit", "index", "before": product, "after": product}
+#   {"seq", "op": "sale", "index", "sale": sale record}
+#   {"seq", "op": "transaction", "lines": [[index, sale record], ...]}
+#   {"seq", "op": "advance_day", "day": new day}
+#   {"seq", "op": "undo" / "redo", "target": seq of the operation}
+# ---------------------------
+def apply_event(state, event):
+    # state: {"products": [...], "current_day"}; changed in place
+    products = state["products"]
+    op = event["op"]
+    if op == "add":
+        products.insert(event["index"], codec.validate(dict(event["after"]), "product"))
+    elif op == "edit":
+        products[event["index"]] = codec.validate(dict(event["after"]), "product")
+    elif op == "sale":
+        products[event["index"]]["quantity"] -= event["sale"]["quantity"]
+    elif op == "transaction":
+        for index, sale in event["lines"]:
+            products[index]["quantity"] -= sale["quantity"]
+    elif op == "advance_day":
+        state["current_day"] = event["day"]
+
+
+def revert_event(state, event):
+    products = state["products"]
+    op = event["op"]
+    if op == "add":
+        del products[event["index"]]
+    elif op == "edit":
+        products[event["index"]] = codec.validate(dict(event["before"]), "product")
+    elif op == "sale":
+        products[event["index"]]["quantity"] += event["sale"]["quantity"]
+    elif op == "transaction":
+        for index, sale in event["lines"]:
+            products[index]["quantity"] += sale["quantity"]
+    elif op == "advance_day":
+        state["current_day"] = event["day"] - 1
+
+
+def rebuild(snapshot, events):
+    # Product and day state after replaying the events that follow the snapshot, undo/redo included
+    # Products go through the codec so that snapshots and events from older versions are upgraded
+    state = {"products": [codec.validate(dict(p), "product") for p in snapshot["products"]],
+             "current_day": snapshot["current_day"]}
+    by_seq = {}
+    for event in events:
+        by_seq[event["seq"]] = event
+        if event["seq"] <= snapshot["seq"]:
+            continue
+        if event["op"] == "undo":
+            revert_event(state, by_seq[event["target"]])
+        elif event["op"] == "redo":
+            apply_event(state, by_seq[event["target"]])
+        else:
+            apply_event(state, event)
+    return state
+
+
+# ---------------------------
+# OperationLog: append-only audit log plus this session's undo/redo stacks
+# ---------------------------
+class OperationLog:
+    def __init__(self, root):
+        self.log_file = os.path.join(root, LOG_FILE)
+        self.snapshot_file = os.path.join(root, SNAPSHOT_FILE)
+        self.seq = self.last_seq()
+        self.undo_stack = collections.deque(maxlen=UNDO_LIMIT)
+        self.redo_stack = []
+
+    def last_seq(self):
+        # Only the tail of the log is read, so startup does not grow with the log. A single event (a large
+        # basket) can be longer than the first read, so the window grows backwards until a whole line decodes.
+        if not os.path.exists(self.log_file):
+            return 0
+        with open(self.log_file, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            start = end
+            size = 65536
+            while start > 0:
+                start = max(0, end - size)
+                f.seek(start)
+                lines = f.read(end - start).splitlines()
+                if start > 0:
+                    lines = lines[1:]  # May begin partway through a line
+                for line in reversed(lines):
+                    try:
+                        return codec.decode(line)["seq"]
+                    except Exception:
+                        continue  # A line cut short by a crash
+                size *= 2
+        return 0
+
+    def write(self, event):
+        self.seq += 1
+        event["seq"] = self.seq
+        with open(self.log_file, "ab") as f:
+            f.write(codec.encode(event, compact=True) + b"\n")
+        return event
+
+    def record(self, op, **fields):
+        # Logs a new operation; it becomes the next one to undo and clears the redo stack
+        event = dict(op=op, **fields)
+        try:
+            self.write(event)
+        except Exception as e:
+            print("Failed to write operation log:", e)
+        self.undo_stack.append(event)
+        self.redo_stack.clear()
+        return event
+
+    def next_undo(self):
+        # The operation undo() would revert, without undoing it
+        return self.undo_stack[-1] if self.undo_stack else None
+
+    def next_redo(self):
+        return self.redo_stack[-1] if self.redo_stack else None
+
+    def undo(self):
+        # Returns the operation to revert, or None
+        if not self.undo_stack:
+            return None
+        event = self.undo_stack.pop()
+        self.redo_stack.append(event)
+        self.write({"op": "undo", "target": event["seq"]})
+        return event
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        event = self.redo_stack.pop()
+        self.undo_stack.append(event)
+        self.write({"op": "redo", "target": event["seq"]})
+        return event
+
+    def events(self):
+        if not os.path.exists(self.log_file):
+            return []
+        with open(self.log_file, "rb") as f:
+            records = []
+            for line in f:
+                try:
+                    records.append(codec.decode(line))
+                except Exception as e:
+                    print("Skipped invalid log line:", e)
+            return records
+
+    # ---------------------------
+    # Snapshots: product and day state at a point in the log
+    # ---------------------------
+    def has_snapshot(self):
+        return os.path.exists(self.snapshot_file)
+
+    def snapshot(self, products, current_day):
+        temp_file = self.snapshot_file + ".tmp"
+        with open(temp_file, "wb") as f:
+            f.write(codec.encode({"seq": self.seq, "current_day": current_day, "products": products}))
+        os.replace(temp_file, self.snapshot_file)
+
+    def load_snapshot(self):
+        with open(self.snapshot_file, "rb") as f:
+            return codec.decode(f.read())
+
+    def rebuild(self):
+        return rebuild(self.load_snapshot(), self.events())
+
+
+def describe(event):
+    op = event["op"]
+    if op in ("undo", "redo"):
+        return f"{op} #{event['target']}"
+    if op == "add":
+        return f"add product {event['after']['name']}"
+    if op == "edit":
+        return f"edit product {event['before']['name']}"
+    if op == "sale":
+        sale = event["sale"]
+        if "kind" in sale:
+            return f"{sale['kind']} of {-sale['quantity']} x {sale['product']} (sale #{sale['ref'] + 1})"
+        return f"sale of {sale['quantity']} x {sale['product']} on day {sale['day']}"
+    if op == "transaction":
+        lines = event["lines"]
+        return f"transaction #{lines[0][1]['txn']} of {len(lines)} lines on day {lines[0][1]['day']}"
+    return f"advance to day {event['day']}"
+
+
+def main(argv=None):
+    from inventory import InventoryManager
+
+    parser = argparse.ArgumentParser(description="Show the operation log or rebuild state from it")
+    parser.add_argument("command", choices=["history", "snapshot", "rebuild"])
+    parser.add_argument("--data-dir", default=".")
+    parser.add_argument("--store", help="Use this store's log in a multi-store setup")
+    parser.add_argument("--restore", action="store_true",
+                        help="rebuild: save the rebuilt products and day instead of only comparing")
+    args = parser.parse_args(argv)
+
+    manager = InventoryManager(args.data_dir, load_history=False, store=args.store)
+    log = manager.oplog
+    if args.command == "history":
+        for event in log.events():
+            print(f"#{event['seq']}: {describe(event)}")
+    elif args.command == "snapshot":
+        log.snapshot(manager.products, manager.current_day)
+        print(f"Snapshot taken at #{log.seq}")
+    else:
+        state = log.rebuild()
+        changed = [p["name"] for p, q in zip(state["products"], manager.products) if p != q]
+        if len(state["products"]) != len(manager.products):
+            print(f"Products: {len(manager.products)} saved, {len(state['products'])} rebuilt")
+        for name in changed:
+            print(f"Differs from the log: {name}")
+        if state["current_day"] != manager.current_day:
+            print(f"Day: {manager.current_day} saved, {state['current_day']} rebuilt")
+        if args.restore:
+            manager.products = state["products"]
+            manager.current_day = state["current_day"]
+            manager.save_definitions()
+            if manager.stock_file is not None:
+                manager.save_products()
+            manager.save_time()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
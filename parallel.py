@@ -0,0 +1,110 @@
+import argparse
+import functools
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import columnar
+from aggregates import SalesAggregates
+from money import format_cents
+from partitions import read_sales_file
+
+
+# ---------------------------
+# Shard workers: run in a worker process, return a small picklable partial result
+# ---------------------------
+def aggregate_sales_file(path, start_day=None, end_day=None):
+    # One shard is decoded in a single call (the fast codec path) rather than streamed,
+    # since a worker only ever holds its own shard
+    aggregates = SalesAggregates()
+    if not os.path.exists(path):
+        return aggregates
+    if columnar.is_columnar(path) and start_day is None and end_day is None:
+        # Compacted segments are aggregated straight from their columns
+        try:
+            aggregates.add_table(columnar.read_table(path))
+        except (OSError, ValueError, RuntimeError) as e:
+            print("Skipped invalid record:", f"{path}: {e}")
+        return aggregates
+    sales, errors = read_sales_file(path)
+    for error in errors:
+        print("Skipped invalid record:", error)
+    if start_day is not None or end_day is not None:
+        first = start_day if start_day is not None else float("-inf")
+        last = end_day if end_day is not None else float("inf")
+        sales = [sale for sale in sales if first <= sale["day"] <= last]
+    aggregates.add_sales(sales)
+    return aggregates
+
+
+# ---------------------------
+# AggregationExecutor: fan partial aggregates out over a process pool and merge them
+# ---------------------------
+class AggregationExecutor:
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None  # Started on first use and kept, so repeated refreshes don't pay for process startup
+
+    def map(self, func, shards):
+        # Yields func(shard) for every shard as the results come in, in any order
+        shards = list(shards)
+        if len(shards) <= 1 or self.workers == 1:
+            # Not worth a round trip through another process
+            for shard in shards:
+                yield func(shard)
+            return
+        if self.pool is None:
+            # Workers are spawned rather than forked: the GUI process has Qt, matplotlib and the HTTP server
+            # threads running, and a forked copy of a threaded process can deadlock on a lock held at fork time
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        futures = [self.pool.submit(func, shard) for shard in shards]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def aggregate_files(self, paths, start_day=None, end_day=None):
+        total = SalesAggregates()
+        job = functools.partial(aggregate_sales_file, start_day=start_day, end_day=end_day)
+        for partial in self.map(job, paths):
+            total.merge(partial)
+        return total
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+_default_executor = None
+
+
+def default_executor():
+    # Shared executor for the GUI and the command line tools
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = AggregationExecutor()
+    return _default_executor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate sales files in parallel")
+    parser.add_argument("files", nargs="+", help="Sales files (segment .jsonl/.jsonl.gz files or sales.json arrays)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--start-day", type=int)
+    parser.add_argument("--end-day", type=int)
+    args = parser.parse_args(argv)
+
+    executor = AggregationExecutor(args.workers)
+    started = time.perf_counter()
+    total = executor.aggregate_files(args.files, args.start_day, args.end_day)
+    elapsed = time.perf_counter() - started
+    executor.shutdown()
+    print(f"Files: {len(args.files)}  Workers: {executor.workers}  Time: {elapsed:.2f}s")
+    print(f"Total Revenue: {format_cents(total.total_revenue_cents)}    "
+          f"Total Profit: {format_cents(total.total_profit_cents)}")
+    print(f"Products: {len(total.quantity_by_product)}  Days: {len(total.revenue_cents_by_day)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import argparse
+import sys
+
+import numpy as np
+
+from money import format_cents
+
+CLASSES = "ABC"
+CLASS_SHARES = (0.80, 0.95)  # Cumulative share of the value held by classes A and A+B; the rest is C
+DRIFT = 0.02  # How far those shares may move between full reclassifications
+
+
+# ---------------------------
+# ParetoClassifier: ABC classes by contribution to a value (revenue or profit per product).
+# A full pass sorts the products and sets value cutoffs between the classes; after that a sale only
+# moves its own product across a cutoff. The catalog is reclassified when the share held by A or
+# A+B has drifted more than DRIFT from what the last full pass gave.
+# ---------------------------
+class ParetoClassifier:
+    def __init__(self, values, shares=CLASS_SHARES, drift=DRIFT):
+        self.values = dict(values)  # name -> value; negative values count as 0
+        self.shares = shares
+        self.drift = drift
+        self.rebuilds = 0
+        self.rebuild()
+
+    def rebuild(self):
+        names = list(self.values)
+        values = np.clip(np.fromiter(self.values.values(), dtype=np.int64, count=len(names)), 0, None)
+        order = np.argsort(-values, kind="stable")
+        ranked = values[order]
+        before = np.cumsum(ranked) - ranked  # Value of the products ranked above each one
+        self.total = int(ranked.sum())
+        # A product is in a class while the products above it hold less than the class's share,
+        # so the product that crosses a boundary still counts in the class it completes
+        classes = np.full(len(names), 2, dtype=np.int8)
+        classes[(before < self.shares[1] * self.total) & (ranked > 0)] = 1
+        classes[(before < self.shares[0] * self.total) & (ranked > 0)] = 0
+        self.classes = {names[i]: CLASSES[c] for i, c in zip(order.tolist(), classes.tolist())}
+        self.cutoffs = []  # Smallest value in A, then in B
+        for c in (0, 1):
+            members = ranked[classes == c]
+            self.cutoffs.append(int(members[-1]) if len(members) else None)
+        self.sums = {name: int(ranked[classes == c].sum()) for c, name in enumerate(CLASSES)}
+        self.base_shares = self.class_shares()
+        self.rebuilds += 1
+
+    def class_shares(self):
+        # Share of the total held by A and by A+B, or None before anything has value
+        if self.total <= 0:
+            return None
+        return self.sums["A"] / self.total, (self.sums["A"] + self.sums["B"]) / self.total
+
+    def class_for(self, value):
+        if value <= 0:
+            return "C"
+        for cls, cutoff in zip("AB", self.cutoffs):
+            if cutoff is not None and value >= cutoff:
+                return cls
+        return "C"
+
+    def update(self, name, value):
+        old_value = max(self.values.get(name, 0), 0)
+        self.values[name] = value
+        value = max(value, 0)
+        old_class = self.classes.get(name, "C")
+        new_class = self.class_for(value)
+        self.classes[name] = new_class
+        self.sums[old_class] -= old_value
+        self.sums[new_class] += value
+        self.total += value - old_value
+        if self.drifted():
+            self.rebuild()
+
+    def drifted(self):
+        shares = self.class_shares()
+        if self.base_shares is None or shares is None:
+            return shares != self.base_shares  # The first value arrived, or the last went away
+        return any(abs(now - base) > self.drift for now, base in zip(shares, self.base_shares))
+
+    def discard(self, name):
+        if name in self.values:
+            self.update(name, 0)
+            del self.values[name]
+            del self.classes[name]
+
+    def get(self, name):
+        return self.classes.get(name, "C")
+
+    def members(self, cls):
+        return [name for name, c in self.classes.items() if c == cls]
+
+
+def main(argv=None):
+    from inventory import InventoryManager
+
+    parser = argparse.ArgumentParser(description="ABC (Pareto) classes of the products")
+    parser.add_argument("--data-dir", default=".")
+    parser.add_argument("--store", help="Classify this store's sales in a multi-store setup")
+    parser.add_argument("--metric", choices=["revenue", "profit"], default="revenue")
+    args = parser.parse_args(argv)
+
+    manager = InventoryManager(args.data_dir, store=args.store)
+    classifier = manager.aggregates.get_pareto(args.metric, manager.products)
+    for cls in CLASSES:
+        names = classifier.members(cls)
+        value = sum(max(classifier.values[name], 0) for name in names)
+        share = value / classifier.total if classifier.total > 0 else 0
+        print(f"Class {cls}: {len(names)} products, {format_cents(value)} {args.metric} ({share:.1%})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
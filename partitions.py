@@ -0,0 +1,351 @@
+import argparse
+import gzip
+import os
+import sys
+import time
+
+import codec
+import columnar
+import metrics
+
+PARTITION_DAYS = 30  # Days per segment file (about a month)
+MANIFEST_FILE = "sales_manifest.json"
+SEGMENTS_DIR = "sales"
+
+APPEND_SECONDS = metrics.histogram("sales_append_seconds", "Time to append new sales to the open segment")
+APPEND_BYTES = metrics.counter("sales_append_bytes_total", "Bytes appended to sales segments")
+
+
+class SegmentError(ValueError):
+    # A segment did not load cleanly. It is then read-only: never rewritten from the records that did
+    # load, truncated or deleted, so nothing more is lost than what could not be read.
+    pass
+
+
+# ---------------------------
+# Segment files: JSON Lines, one sale per line. Closed segments are compacted into
+# compressed columnar files (see columnar.py) or, alternatively, gzipped as they are.
+# ---------------------------
+def read_segment(path):
+    # Returns (sales, errors) for one segment file
+    if columnar.is_columnar(path):
+        try:
+            table = columnar.read_table(path)
+        except (OSError, ValueError, RuntimeError) as e:
+            return [], [f"{path}: {e}"]  # e.g. a zstd segment where zstandard is not installed
+        sales = columnar.decode_table(table)
+        if codec.LEGACY_MONEY["sale"].keys() & table["columns"].keys():
+            sales = [codec.validate(sale, "sale") for sale in sales]  # Compacted before money was in cents
+        return sales, []
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        return codec.load_jsonl_records(f.read(), "sale", path)
+
+
+def read_sales_file(path):
+    # Any sales file: a segment, or a legacy sales.json array
+    if path.endswith(".json"):
+        with open(path, "rb") as f:
+            return codec.load_records(f.read(), "sale", path)
+    return read_segment(path)
+
+
+def write_segment(path, sales):
+    temp_file = path + ".tmp"
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(temp_file, "wb") as f:
+        f.write(b"".join(codec.encode(sale, compact=True) + b"\n" for sale in sales))
+    os.replace(temp_file, path)
+
+
+# ---------------------------
+# PartitionedSalesStore: sales split into day-range segments listed in a manifest
+# ---------------------------
+class PartitionedSalesStore:
+    def __init__(self, root, partition_days=PARTITION_DAYS, read_only=False):
+        # read_only: for tools that only read (reports, export); nothing in root is created or changed,
+        # and an old single sales.json is read as it is instead of being split up
+        self.root = root
+        self.manifest_file = os.path.join(root, MANIFEST_FILE)
+        self.segments_dir = os.path.join(root, SEGMENTS_DIR)
+        self.manifest = {"partition_days": partition_days, "segments": []}
+        legacy_file = os.path.join(root, "sales.json")
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, "rb") as f:
+                self.manifest = codec.decode(f.read())
+        elif not read_only:
+            self.migrate_legacy(legacy_file)
+        elif os.path.exists(legacy_file):
+            # One closed segment covering every day (an absolute file name overrides the segments directory)
+            self.segments.append({"file": os.path.abspath(legacy_file), "first_day": 1, "last_day": sys.maxsize,
+                                  "closed": True, "count": 0})
+
+    @property
+    def segments(self):
+        # Each segment: {file, first_day, last_day, closed, count}; sorted by day
+        return self.manifest["segments"]
+
+    def save_manifest(self):
+        temp_file = self.manifest_file + ".tmp"
+        with open(temp_file, "wb") as f:
+            f.write(codec.encode(self.manifest))
+        os.replace(temp_file, self.manifest_file)
+
+    def day_range(self, day):
+        size = self.manifest["partition_days"]
+        first = (day - 1) // size * size + 1
+        return first, first + size - 1
+
+    def segment_path(self, segment):
+        return os.path.join(self.segments_dir, segment["file"])
+
+    def segments_between(self, start_day=None, end_day=None):
+        # Partition pruning: only segments that can hold sales in [start_day, end_day]
+        for segment in self.segments:
+            if start_day is not None and segment["last_day"] < start_day:
+                continue
+            if end_day is not None and segment["first_day"] > end_day:
+                continue
+            yield segment
+
+    def segment_paths(self, start_day=None, end_day=None):
+        return [self.segment_path(s) for s in self.segments_between(start_day, end_day)]
+
+    def open_segment(self, day):
+        # The segment that takes new sales for `day`; created, and older ones closed, when a new range starts
+        first, last = self.day_range(day)
+        segment = next((s for s in self.segments if s["first_day"] == first), None)
+        if segment is not None:
+            if segment["closed"]:
+                self.reopen(segment)  # The day was moved back (undo) into a range that had closed
+            self.drop_empty_after(last)
+            return segment
+        self.close_before(day)
+        self.drop_empty_after(last)
+        segment = {"file": f"d{first:06d}-{last:06d}.jsonl", "first_day": first, "last_day": last,
+                   "closed": False, "count": 0}
+        self.segments.append(segment)
+        self.segments.sort(key=lambda s: s["first_day"])
+        os.makedirs(self.segments_dir, exist_ok=True)
+        open(self.segment_path(segment), "ab").close()
+        self.save_manifest()
+        return segment
+
+    def drop_empty_after(self, day):
+        # Removes segments after `day` that hold no sales, left behind when the day was moved back
+        kept = []
+        for segment in self.segments:
+            path = self.segment_path(segment)
+            if segment["first_day"] > day and (read_segment(path) == ([], []) if segment["closed"] else
+                                               not os.path.exists(path) or os.path.getsize(path) == 0):
+                if os.path.exists(path):
+                    os.remove(path)
+            else:
+                kept.append(segment)
+        if len(kept) != len(self.segments):
+            self.manifest["segments"] = kept
+            self.save_manifest()
+
+    def reopen(self, segment):
+        # Turns a closed (possibly compressed or compacted) segment back into a plain JSON Lines file
+        path = self.segment_path(segment)
+        sales = self.read_clean(segment)
+        segment["file"] = segment["file"].split(".", 1)[0] + ".jsonl"
+        write_segment(self.segment_path(segment), sales)
+        if self.segment_path(segment) != path:
+            os.remove(path)
+        segment["closed"] = False
+        self.save_manifest()
+
+    def close_before(self, day):
+        # Segments whose range has passed become read-only; the manifest records their final count
+        changed = False
+        for segment in self.segments:
+            if not segment["closed"] and segment["last_day"] < day:
+                sales, _ = read_segment(self.segment_path(segment))
+                segment["closed"] = True
+                segment["count"] = len(sales)
+                changed = True
+        if changed:
+            self.save_manifest()
+
+    # ---------------------------
+    # Reading
+    # ---------------------------
+    def load_all(self):
+        # Returns (sales, errors) for every segment in day order
+        sales, errors = [], []
+        for segment in self.segments:
+            segment_sales, segment_errors = read_sales_file(self.segment_path(segment))
+            sales.extend(segment_sales)
+            errors.extend(segment_errors)
+        return sales, errors
+
+    def read_clean(self, segment):
+        # The segment's sales, for rewriting it; raises SegmentError if any of it could not be read
+        sales, errors = read_segment(self.segment_path(segment))
+        if errors:
+            raise SegmentError(f"A sales segment did not load cleanly and is left as it is: {errors[0]}")
+        return sales
+
+    def check_segments(self):
+        # Raises SegmentError unless every segment loads cleanly, before anything is rewritten
+        for segment in self.segments:
+            self.read_clean(segment)
+
+    def iter_sales(self, start_day=None, end_day=None):
+        # Streams sales one segment at a time, skipping segments outside the day range
+        for segment in self.segments_between(start_day, end_day):
+            sales, errors = read_sales_file(self.segment_path(segment))
+            for error in errors:
+                print("Skipped invalid record:", error)
+            for sale in sales:
+                if (start_day is None or sale["day"] >= start_day) and (end_day is None or sale["day"] <= end_day):
+                    yield sale
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+    def append(self, sales):
+        # Appends new sales to the open segment; only that one file is touched
+        if not sales:
+            return
+        with APPEND_SECONDS.time():
+            segment = self.open_segment(sales[0]["day"])
+            data = b"".join(codec.encode(sale, compact=True) + b"\n" for sale in sales)
+            with open(self.segment_path(segment), "ab") as f:
+                f.write(data)
+        APPEND_BYTES.inc(len(data))
+
+    def remove(self, removed):
+        # Removes the last record equal to each of `removed` from its segment; only the segments
+        # holding those days are rewritten, each once, and none of them unless all load cleanly
+        by_first_day = {}
+        for sale in removed:
+            by_first_day.setdefault(self.day_range(sale["day"])[0], []).append(sale)
+        targets = [(segment, self.read_clean(segment)) for segment in self.segments
+                   if segment["first_day"] in by_first_day]
+        for segment, sales in targets:
+            path = self.segment_path(segment)
+            for sale in by_first_day[segment["first_day"]]:
+                for i in range(len(sales) - 1, -1, -1):
+                    if sales[i] == sale:
+                        del sales[i]
+                        break
+            if columnar.is_columnar(path):
+                columnar.write_table(path, sales)
+            else:
+                write_segment(path, sales)
+            if segment["closed"]:
+                segment["count"] = len(sales)
+        self.save_manifest()
+
+    def rewrite(self, sales):
+        # Rewrites every segment from a full sales list; used only for maintenance such as renaming a product.
+        # New segments start open; close_before(current_day) closes the ones in the past.
+        # A segment that does not load cleanly is missing records from `sales`, so nothing is rewritten then.
+        self.check_segments()
+        by_range = {}
+        for sale in sales:
+            by_range.setdefault(self.day_range(sale["day"]), []).append(sale)
+        old = {segment["first_day"]: segment for segment in self.segments}
+        segments = []
+        os.makedirs(self.segments_dir, exist_ok=True)
+        for (first, last), segment_sales in sorted(by_range.items()):
+            previous = old.pop(first, None)
+            segment = {"file": f"d{first:06d}-{last:06d}.jsonl", "first_day": first, "last_day": last,
+                       "closed": previous["closed"] if previous else False, "count": len(segment_sales)}
+            if previous and previous["file"] != segment["file"]:
+                os.remove(self.segment_path(previous))
+            write_segment(self.segment_path(segment), segment_sales)
+            segments.append(segment)
+        for previous in old.values():
+            if previous["closed"]:
+                os.remove(self.segment_path(previous))
+            else:
+                # Keep the open segment even when it has no sales yet
+                write_segment(self.segment_path(previous), [])
+                segments.append(dict(previous, count=0))
+        segments.sort(key=lambda s: s["first_day"])
+        self.manifest["segments"] = segments
+        self.save_manifest()
+
+    def compress(self, before_day=None):
+        # Gzips closed segments (optionally only those ending before before_day); each one independently
+        for segment in self.segments:
+            if not segment["closed"] or segment["file"].endswith(".gz") or columnar.is_columnar(segment["file"]):
+                continue
+            if before_day is not None and segment["last_day"] >= before_day:
+                continue
+            path = self.segment_path(segment)
+            with open(path, "rb") as source, gzip.open(path + ".gz.tmp", "wb") as target:
+                target.write(source.read())
+            os.replace(path + ".gz.tmp", path + ".gz")
+            segment["file"] += ".gz"
+            self.save_manifest()
+            os.remove(path)
+
+    def compact(self):
+        # Rewrites every closed segment as a compressed columnar file.
+        # Returns (file, bytes before, bytes after) for each segment compacted.
+        results = []
+        for segment in self.segments:
+            if not segment["closed"] or columnar.is_columnar(segment["file"]):
+                continue
+            path = self.segment_path(segment)
+            sales, errors = read_segment(path)
+            if errors:
+                # Leave a segment with unreadable lines as it is rather than losing them
+                print(f"Not compacting {path}:", errors[0])
+                continue
+            name = segment["file"].split(".", 1)[0] + columnar.columnar_suffix()
+            target = os.path.join(self.segments_dir, name)
+            columnar.write_table(target, sales)
+            results.append((name, os.path.getsize(path), os.path.getsize(target)))
+            segment["file"] = name
+            self.save_manifest()
+            os.remove(path)
+        return results
+
+    def migrate_legacy(self, sales_file):
+        # Splits an existing single sales.json into segments; the old file is kept as a backup
+        if not os.path.exists(sales_file):
+            return
+        sales, errors = read_sales_file(sales_file)
+        for error in errors:
+            print("Skipped invalid record:", error)
+        self.rewrite(sales)
+        os.replace(sales_file, sales_file + ".migrated")
+        print(f"Sales records moved into {len(self.segments)} segment files")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain day-partitioned sales segments")
+    parser.add_argument("command", choices=["list", "compress", "compact"])
+    parser.add_argument("--data-dir", default=".", help="Directory holding the sales manifest")
+    parser.add_argument("--before-day", type=int, help="compress: only segments that end before this day")
+    args = parser.parse_args(argv)
+
+    store = PartitionedSalesStore(args.data_dir)
+    if args.command == "compress":
+        store.compress(args.before_day)
+    elif args.command == "compact":
+        started = time.perf_counter()
+        store.load_all()
+        before_load = time.perf_counter() - started
+        results = store.compact()
+        started = time.perf_counter()
+        store.load_all()
+        after_load = time.perf_counter() - started
+        before = sum(r[1] for r in results)
+        after = sum(r[2] for r in results)
+        print(f"Compacted {len(results)} segments: {before} -> {after} bytes; "
+              f"load time {before_load:.3f}s -> {after_load:.3f}s")
+    for segment in store.segments:
+        state = "closed" if segment["closed"] else "open"
+        print(f"{segment['file']}: days {segment['first_day']}-{segment['last_day']}, {state}, "
+              f"{segment['count']} sales")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
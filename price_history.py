@@ -0,0 +1,128 @@
+import argparse
+import bisect
+import os
+import sys
+
+
+import codec
+from money import format_cents
+
+HISTORY_FILE = "price_history.json"
+
+
+# ---------------------------
+# PriceHistory: price and cost versions per product, each effective from its day until the next
+# version's day. Versions are kept as parallel lists sorted by day, so the version in force on a
+# day is one bisect: O(log versions).
+#   File: {product name: [[effective day, price_cents, cost_cents], ...]}
+# ---------------------------
+class PriceHistory:
+    def __init__(self, path):
+        self.path = path
+        self.versions = {}  # product name -> {"days": [...], "prices": [...], "costs": [...]}
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = codec.decode(f.read())
+            self.versions = {}
+            for name, rows in data.items():
+                rows = sorted(rows)
+                self.versions[name] = {"days": [r[0] for r in rows], "prices": [r[1] for r in rows],
+                                       "costs": [r[2] for r in rows]}
+        except Exception as e:
+            print("Failed to load price history:", e)
+
+    def save(self):
+        try:
+            data = {name: [list(row) for row in zip(v["days"], v["prices"], v["costs"])]
+                    for name, v in self.versions.items()}
+            temp_file = self.path + ".tmp"
+            with open(temp_file, "wb") as f:
+                f.write(codec.encode(data))
+            os.replace(temp_file, self.path)
+        except Exception as e:
+            print("Failed to save price history:", e)
+
+    def seed(self, products, day):
+        # Products from before the history was kept start with their current price from day, the day the
+        # history first sees them; what they cost before that is unknown. Returns whether any were seeded.
+        missing = [p for p in products if p["name"] not in self.versions]
+        for product in missing:
+            self.record(product, day)
+        return bool(missing)
+
+    def record(self, product, day):
+        # Makes the product's current price and cost effective from day; returns whether the history changed.
+        # A second change on the same day replaces that day's version.
+        versions = self.versions.setdefault(product["name"], {"days": [], "prices": [], "costs": []})
+        days, prices, costs = versions["days"], versions["prices"], versions["costs"]
+        price, cost = product["price_cents"], product["cost_cents"]
+        i = bisect.bisect_right(days, day)
+        if i and days[i - 1] == day:
+            if (prices[i - 1], costs[i - 1]) == (price, cost):
+                return False
+            i -= 1
+            del days[i], prices[i], costs[i]
+            if i and (prices[i - 1], costs[i - 1]) == (price, cost):
+                return True  # Changed back to the version before, e.g. by undo
+        elif i and (prices[i - 1], costs[i - 1]) == (price, cost):
+            return False
+        days.insert(i, day)
+        prices.insert(i, price)
+        costs.insert(i, cost)
+        return True
+
+    def rename(self, old_name, new_name):
+        if old_name in self.versions:
+            self.versions[new_name] = self.versions.pop(old_name)
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    def version_on(self, name, day):
+        # (price_cents, cost_cents) in force on day, or None before the product's first version
+        versions = self.versions.get(name)
+        if versions is None:
+            return None
+        i = bisect.bisect_right(versions["days"], day) - 1
+        if i < 0:
+            return None
+        return versions["prices"][i], versions["costs"][i]
+
+    def changes(self, name):
+        # [(effective day, price_cents, cost_cents), ...] in day order
+        versions = self.versions.get(name)
+        if versions is None:
+            return []
+        return list(zip(versions["days"], versions["prices"], versions["costs"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show a product's price and cost history")
+    parser.add_argument("product")
+    parser.add_argument("--data-dir", default=".")
+    parser.add_argument("--day", type=int, help="Only show the price and cost in force on this day")
+    args = parser.parse_args(argv)
+
+    history = PriceHistory(os.path.join(args.data_dir, HISTORY_FILE))
+    history.load()
+    if args.product not in history.versions:
+        print(f"No price history for {args.product}")
+        return 1
+    if args.day is not None:
+        version = history.version_on(args.product, args.day)
+        if version is None:
+            print(f"{args.product} had no price on day {args.day}")
+        else:
+            print(f"Day {args.day}: price {format_cents(version[0])}, cost {format_cents(version[1])}")
+        return
+    for day, price, cost in history.changes(args.product):
+        margin = f"{(price - cost) / price:.1%}" if price else "n/a"
+        print(f"From day {day}: price {format_cents(price)}, cost {format_cents(cost)}, margin {margin}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+import argparse
+import bisect
+import os
+import sys
+
+import codec
+from money import format_cents
+
+RULES_FILE = "pricing_rules.json"
+RULE_TYPES = ("percent", "fixed", "buy_x_get_y", "tier")
+
+
+# ---------------------------
+# Rules: {name, type, products, start_day, end_day, ...} as in codec.Rule. A rule is active from
+# start_day to end_day inclusive (0 leaves that end open) and applies to the listed products, or
+# to every product when the list is empty.
+# ---------------------------
+def load_rules(path):
+    # Returns (rules, errors); a missing file means no rules
+    if not os.path.exists(path):
+        return [], []
+    with open(path, "rb") as f:
+        rules, errors = codec.load_records(f.read(), "rule", path)
+    valid = []
+    for rule in rules:
+        problem = check_rule(rule)
+        if problem:
+            errors.append(f"{path}: rule {rule['name']}: {problem}")
+        else:
+            valid.append(rule)
+    return valid, errors
+
+
+def save_rules(path, rules):
+    temp_file = path + ".tmp"
+    with open(temp_file, "wb") as f:
+        f.write(codec.encode(rules))
+    os.replace(temp_file, path)
+
+
+def check_rule(rule):
+    # Returns what is wrong with a rule, or None
+    kind = rule["type"]
+    if kind not in RULE_TYPES:
+        return f"unknown type {kind}"
+    if kind == "percent" and not 0 < rule["percent"] <= 100:
+        return "percent must be between 0 and 100"
+    if kind == "fixed" and rule["amount_cents"] <= 0:
+        return "amount_cents must be positive"
+    if kind == "buy_x_get_y" and (rule["buy"] <= 0 or rule["free"] <= 0):
+        return "buy and free must be positive"
+    if kind == "tier":
+        if not rule["tiers"]:
+            return "tiers is empty"
+        for tier in rule["tiers"]:
+            if len(tier) != 2 or tier[0] <= 0 or tier[1] < 0:
+                return "each tier must be [minimum quantity, unit price in cents]"
+    return None
+
+
+def is_active(rule, day):
+    return (not rule["start_day"] or rule["start_day"] <= day) and (not rule["end_day"] or day <= rule["end_day"])
+
+
+# ---------------------------
+# ProductPricing: the active rules for one product, reduced to the best rule of each type and
+# a single tier table, so a quote is a handful of integer operations and one bisect
+# ---------------------------
+class ProductPricing:
+    def __init__(self):
+        self.percent = None
+        self.fixed = None
+        self.bxgy = None
+        self.tiers = []  # (minimum quantity, unit price in cents, rule name) from every tier rule
+        self.tier_minimums = []  # Compiled: ascending minimum quantities...
+        self.tier_prices = []  # ...the lowest unit price reached at each...
+        self.tier_names = []  # ...and the rule giving it
+
+    def copy(self):
+        pricing = ProductPricing()
+        pricing.percent = self.percent
+        pricing.fixed = self.fixed
+        pricing.bxgy = self.bxgy
+        pricing.tiers = list(self.tiers)
+        return pricing
+
+    def add(self, rule):
+        kind = rule["type"]
+        if kind == "percent":
+            if self.percent is None or rule["percent"] > self.percent["percent"]:
+                self.percent = rule
+        elif kind == "fixed":
+            if self.fixed is None or rule["amount_cents"] > self.fixed["amount_cents"]:
+                self.fixed = rule
+        elif kind == "buy_x_get_y":
+            # The rule giving the largest share of units free
+            if self.bxgy is None or (rule["free"] * (self.bxgy["buy"] + self.bxgy["free"])
+                                     > self.bxgy["free"] * (rule["buy"] + rule["free"])):
+                self.bxgy = rule
+        else:
+            self.tiers.extend((minimum, price, rule["name"]) for minimum, price in rule["tiers"])
+
+    def finish(self):
+        # Merges the tier rules into one step function; a larger quantity never gets a higher unit price
+        self.tier_minimums, self.tier_prices, self.tier_names = [], [], []
+        for minimum, price, name in sorted(self.tiers):
+            if self.tier_prices and price >= self.tier_prices[-1]:
+                continue
+            if self.tier_minimums and self.tier_minimums[-1] == minimum:
+                self.tier_prices[-1], self.tier_names[-1] = price, name
+                continue
+            self.tier_minimums.append(minimum)
+            self.tier_prices.append(price)
+            self.tier_names.append(name)
+        return self
+
+    def quote(self, price_cents, quantity):
+        # (discount in cents, rule name) of the best single rule for this line; rules do not stack
+        best, best_name = 0, None
+        total = quantity * price_cents
+        if self.percent is not None:
+            discount = round(total * self.percent["percent"] / 100)
+            if discount > best:
+                best, best_name = discount, self.percent["name"]
+        if self.fixed is not None:
+            discount = quantity * min(self.fixed["amount_cents"], price_cents)
+            if discount > best:
+                best, best_name = discount, self.fixed["name"]
+        if self.bxgy is not None:
+            group = self.bxgy["buy"] + self.bxgy["free"]
+            discount = quantity // group * self.bxgy["free"] * price_cents
+            if discount > best:
+                best, best_name = discount, self.bxgy["name"]
+        if self.tier_minimums:
+            step = bisect.bisect_right(self.tier_minimums, quantity) - 1
+            if step >= 0:
+                discount = quantity * (price_cents - self.tier_prices[step])
+                if discount > best:
+                    best, best_name = discount, self.tier_names[step]
+        return best, best_name
+
+
+# ---------------------------
+# PricingEngine: rules compiled for one day into a product name -> ProductPricing table.
+# Compiling happens when the day changes or the rules do; pricing a sale is a dict lookup.
+# ---------------------------
+class PricingEngine:
+    def __init__(self, rules=()):
+        self.rules = list(rules)
+        self.day = None
+        self.table = {}  # product name -> ProductPricing, for products with rules of their own
+        self.everything = None  # Rules for every product, or None when there are none
+
+    def set_rules(self, rules):
+        self.rules = list(rules)
+        if self.day is not None:
+            self.compile(self.day)
+
+    def compile(self, day):
+        self.day = day
+        active = [rule for rule in self.rules if is_active(rule, day)]
+        everything = ProductPricing()
+        for rule in active:
+            if not rule["products"]:
+                everything.add(rule)
+        table = {}
+        for rule in active:
+            for name in rule["products"]:
+                if name not in table:
+                    table[name] = everything.copy()
+                table[name].add(rule)
+        self.table = {name: pricing.finish() for name, pricing in table.items()}
+        has_everything = any(not rule["products"] for rule in active)
+        self.everything = everything.finish() if has_everything else None
+
+    def quote(self, product, quantity):
+        # Returns (revenue in cents, discount in cents, rule name or None) for selling quantity of product
+        total = quantity * product["price_cents"]
+        pricing = self.table.get(product["name"], self.everything)
+        if pricing is None or quantity <= 0:
+            return total, 0, None
+        discount, name = pricing.quote(product["price_cents"], quantity)
+        return total - discount, discount, name
+
+    def rename_product(self, old_name, new_name):
+        # Returns whether any rule named the product
+        changed = False
+        for rule in self.rules:
+            if old_name in rule["products"]:
+                rule["products"] = [new_name if name == old_name else name for name in rule["products"]]
+                changed = True
+        if old_name in self.table:
+            self.table[new_name] = self.table.pop(old_name)
+        return changed
+
+
+def main(argv=None):
+    from inventory import InventoryManager
+
+    parser = argparse.ArgumentParser(description="List pricing rules and quote prices with them")
+    parser.add_argument("command", choices=["list", "quote"])
+    parser.add_argument("--data-dir", default=".")
+    parser.add_argument("--day", type=int, help="Day to price for (default: the current day)")
+    parser.add_argument("--product", help="quote: product name or SKU")
+    parser.add_argument("--quantity", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    manager = InventoryManager(args.data_dir, load_history=False)
+    engine = manager.pricing
+    if args.day is not None:
+        engine.compile(args.day)
+    if args.command == "list":
+        for rule in engine.rules:
+            state = "active" if is_active(rule, engine.day) else "inactive"
+            scope = ", ".join(rule["products"]) or "all products"
+            print(f"{rule['name']}: {rule['type']} on {scope}, {state} on day {engine.day}")
+        return
+    index = next((i for i, p in enumerate(manager.products) if p["name"] == args.product), -1)
+    if index < 0:
+        index = manager.find_by_sku(args.product or "")
+    if index < 0:
+        print(f"No product {args.product}")
+        return 1
+    product = manager.products[index]
+    revenue, discount, name = engine.quote(product, args.quantity)
+    print(f"{args.quantity} x {product['name']} on day {engine.day}: {format_cents(revenue)}"
+          + (f" ({format_cents(discount)} off with {name})" if discount else ""))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import bisect
+
+from PyQt5 import QtCore, QtWidgets
+
+SUGGESTIONS = 50  # Most matches shown in the completer popup
+
+
+# ---------------------------
+# ProductIndex: product search by prefix (bisect over sorted names) and by substring
+# (trigram postings), kept up to date one product at a time
+# ---------------------------
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ProductIndex:
+    def __init__(self, names=()):
+        self.rebuild(names)
+
+    def rebuild(self, names):
+        self.names = list(names)  # row -> name, in product order
+        self.sorted_keys = sorted((name.lower(), row) for row, name in enumerate(self.names))
+        self.rows = {name: row for row, name in enumerate(self.names)}  # name -> row
+        self.postings = {}  # trigram -> rows whose lowercase name contains it
+        for row, name in enumerate(self.names):
+            self.add_postings(row, name)
+
+    def add_postings(self, row, name):
+        for gram in trigrams(name.lower()):
+            self.postings.setdefault(gram, set()).add(row)
+
+    def remove_postings(self, row, name):
+        for gram in trigrams(name.lower()):
+            rows = self.postings.get(gram)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self.postings[gram]
+
+    def append(self, name):
+        row = len(self.names)
+        self.names.append(name)
+        self.rows[name] = row
+        bisect.insort(self.sorted_keys, (name.lower(), row))
+        self.add_postings(row, name)
+
+    def rename(self, row, name):
+        old = self.names[row]
+        if old == name:
+            return
+        del self.sorted_keys[bisect.bisect_left(self.sorted_keys, (old.lower(), row))]
+        self.remove_postings(row, old)
+        if self.rows.get(old) == row:
+            del self.rows[old]
+        self.names[row] = name
+        self.rows[name] = row
+        bisect.insort(self.sorted_keys, (name.lower(), row))
+        self.add_postings(row, name)
+
+    def row(self, name):
+        return self.rows.get(name, -1)
+
+    def search(self, text, limit=SUGGESTIONS):
+        # Rows of products whose name starts with text (alphabetical), then those containing it elsewhere
+        text = text.lower()
+        if not text:
+            return []
+        results = []
+        start = bisect.bisect_left(self.sorted_keys, (text,))
+        for key, row in self.sorted_keys[start:start + limit]:
+            if not key.startswith(text):
+                break
+            results.append(row)
+        if len(results) >= limit:
+            return results
+        found = set(results)
+        if len(text) >= 3:
+            grams = sorted(trigrams(text), key=lambda gram: len(self.postings.get(gram, ())))
+            candidates = set(self.postings.get(grams[0], ()))
+            for gram in grams[1:]:
+                candidates &= self.postings.get(gram, set())
+        else:
+            candidates = range(len(self.names))  # Too short for trigrams; a scan of the names
+        contains = [row for row in candidates if row not in found and text in self.names[row].lower()]
+        contains.sort(key=lambda row: self.names[row].lower())
+        return results + contains[:limit - len(results)]
+
+
+# ---------------------------
+# ProductListModel: the manager's product list as a Qt model, so the picker shares it instead of copying names
+# ---------------------------
+class ProductListModel(QtCore.QAbstractListModel):
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.manager.products)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if index.isValid() and role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return self.manager.products[index.row()]["name"]
+        return None
+
+
+# ---------------------------
+# ProductPicker: editable combo box with type-ahead suggestions from a ProductIndex
+# ---------------------------
+class ProductPicker(QtWidgets.QComboBox):
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.setEditable(True)
+        self.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+        self.product_model = ProductListModel(manager, self)
+        self.setModel(self.product_model)
+        self.name_index = ProductIndex(p["name"] for p in manager.products)
+
+        # The completer shows our search results as they are; it does no filtering of its own
+        self.suggestions = QtCore.QStringListModel(self)
+        self.type_ahead = QtWidgets.QCompleter(self.suggestions, self)
+        self.type_ahead.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        self.type_ahead.setCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        self.setCompleter(self.type_ahead)
+        self.lineEdit().textEdited.connect(self.suggest)
+        self.type_ahead.activated[str].connect(self.select_name)
+
+    def suggest(self, text):
+        rows = self.name_index.search(text)
+        self.suggestions.setStringList([self.name_index.names[row] for row in rows])
+        if rows:
+            self.type_ahead.complete()
+
+    def select_name(self, name):
+        row = self.name_index.row(name)
+        if row >= 0:
+            self.setCurrentIndex(row)
+
+    def current_product(self):
+        # Row of the product named in the edit box (typed or picked, or a scanned SKU), or -1
+        text = self.currentText()
+        row = self.name_index.row(text)
+        return row if row >= 0 else self.manager.find_by_sku(text.strip())
+
+    # Incremental updates after one product changes; refresh() after anything bigger (undo/redo)
+    def product_added(self):
+        row = len(self.manager.products) - 1
+        self.product_model.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.product_model.endInsertRows()
+        self.name_index.append(self.manager.products[row]["name"])
+
+    def product_changed(self, row):
+        self.name_index.rename(row, self.manager.products[row]["name"])
+        model_index = self.product_model.index(row)
+        self.product_model.dataChanged.emit(model_index, model_index)
+
+    def refresh(self):
+        current = self.currentText()
+        self.product_model.beginResetModel()
+        self.product_model.endResetModel()
+        self.name_index.rebuild(p["name"] for p in self.manager.products)
+        self.select_name(current)
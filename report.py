@@ -0,0 +1,168 @@
+import argparse
+import csv
+import os
+import sys
+
+import matplotlib
+matplotlib.use("Agg")  # Render without a display
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from aggregates import SalesAggregates
+from charts import AnalysisCharts, chart_inputs
+from inventory import InventoryManager
+from money import from_cents
+
+PARQUET_BATCH = 10000  # Rows buffered before a Parquet row group is written
+
+
+# ---------------------------
+# Table writers: CSV or Parquet, fed one row at a time
+# ---------------------------
+class CsvTableWriter:
+    def __init__(self, path, columns):
+        self.file = open(path + ".csv", "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetTableWriter:
+    def __init__(self, path, columns):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Parquet output needs the pyarrow package (pip install pyarrow)")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path + ".parquet"
+        self.columns = columns
+        self.rows = []
+        self.writer = None
+
+    def write_row(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= PARQUET_BATCH:
+            self.flush()
+
+    def flush(self):
+        data = {column: [row[i] for row in self.rows] for i, column in enumerate(self.columns)}
+        table = self.pa.Table.from_pydict(data)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        if self.rows or self.writer is None:
+            self.flush()
+        self.writer.close()
+
+
+TABLE_WRITERS = {"csv": CsvTableWriter, "parquet": ParquetTableWriter}
+
+
+def write_table(out_dir, name, columns, rows, table_format):
+    writer = TABLE_WRITERS[table_format](os.path.join(out_dir, name), columns)
+    try:
+        for row in rows:
+            writer.write_row(row)
+    finally:
+        writer.close()
+
+
+# ---------------------------
+# Report contents
+# ---------------------------
+def summary_rows(manager):
+    best, best_qty = manager.get_best_selling()
+    worst, worst_qty = manager.get_worst_selling()
+    yield "current_day", manager.current_day
+    yield "total_revenue", from_cents(manager.total_revenue_cents)
+    yield "total_profit", from_cents(manager.total_profit_cents)
+    yield "best_selling_product", best or ""
+    yield "best_selling_quantity", best_qty
+    yield "worst_selling_product", worst or ""
+    yield "worst_selling_quantity", worst_qty
+
+
+def daily_rows(manager):
+    aggregates = manager.aggregates
+    for day in range(1, manager.current_day + 1):
+        yield (day, from_cents(aggregates.revenue_cents_by_day.get(day, 0)),
+               from_cents(aggregates.profit_cents_by_day.get(day, 0)))
+
+
+def product_daily_rows(manager):
+    # Long format (one row per product and day with sales) so the table grows with the data, not days x products
+    for name, by_day in manager.aggregates.product_by_day.items():
+        for day in sorted(by_day):
+            yield day, name, by_day[day]
+
+
+def inventory_rows(manager):
+    for product in manager.products:
+        threshold = manager.get_restock_threshold(product)
+        yield (product["name"], product["quantity"], from_cents(product["price_cents"]), from_cents(product["cost_cents"]),
+               threshold, manager.get_reorder_point(product), product["quantity"] < threshold)
+
+
+def render_charts(manager, path):
+    figure = Figure(figsize=(10, 8))
+    FigureCanvasAgg(figure)
+    charts = AnalysisCharts(figure)
+    charts.update(*chart_inputs(manager.aggregates, manager.products, manager.current_day, manager.price_history))
+    figure.savefig(path)
+
+
+def build_report(data_dir, out_dir, table_format="csv", chart_format="png", store=None, all_stores=False,
+                 start_day=None, end_day=None):
+    # Sales are streamed into the aggregates instead of being loaded as one list; for a day range
+    # only the segments overlapping it are read
+    manager = InventoryManager(data_dir, load_history=False, store=store, read_only=True)
+    if all_stores:
+        manager.aggregates, manager.products = manager.get_chain_view(start_day, end_day)
+    elif start_day is not None or end_day is not None:
+        manager.aggregates = manager.aggregate_range(start_day, end_day)
+    else:
+        manager.aggregates = SalesAggregates()
+        manager.aggregates.add_sales(manager.iter_sales())
+    manager.total_revenue_cents = manager.aggregates.total_revenue_cents
+    manager.total_profit_cents = manager.aggregates.total_profit_cents
+    manager.update_forecast()
+
+    os.makedirs(out_dir, exist_ok=True)
+    write_table(out_dir, "summary", ["metric", "value"], summary_rows(manager), table_format)
+    write_table(out_dir, "daily", ["day", "revenue", "profit"], daily_rows(manager), table_format)
+    write_table(out_dir, "product_daily", ["day", "product", "quantity"], product_daily_rows(manager), table_format)
+    write_table(out_dir, "inventory",
+                ["product", "quantity", "price", "cost", "restock_threshold", "reorder_point", "low_stock"],
+                inventory_rows(manager), table_format)
+    if chart_format != "none":
+        render_charts(manager, os.path.join(out_dir, "charts." + chart_format))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a sales and inventory snapshot report without the GUI")
+    parser.add_argument("--data-dir", default=".", help="Directory with products.json, sales.json and time.json")
+    parser.add_argument("--out", default="report", help="Output directory")
+    parser.add_argument("--format", choices=sorted(TABLE_WRITERS), default="csv", help="Table format")
+    parser.add_argument("--charts", choices=["png", "svg", "none"], default="png", help="Chart image format")
+    parser.add_argument("--store", help="Report on one store of a multi-store setup")
+    parser.add_argument("--all-stores", action="store_true", help="Report on all stores combined")
+    parser.add_argument("--start-day", type=int, help="Only count sales from this day on")
+    parser.add_argument("--end-day", type=int, help="Only count sales up to this day")
+    args = parser.parse_args(argv)
+    build_report(args.data_dir, args.out, args.format, args.charts, args.store, args.all_stores,
+                 args.start_day, args.end_day)
+    print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
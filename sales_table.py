@@ -0,0 +1,177 @@
+import numpy as np
+from PyQt5 import QtCore
+
+from money import format_cents
+
+COLUMNS = ["Product", "Quantity", "Revenue", "Profit", "Day", "Note"]
+NUMERIC = ["quantity", "revenue_cents", "profit_cents", "day"]  # Indexed columns, in table order after Product
+
+
+# ---------------------------
+# SalesIndex: the sales ledger as numpy columns (product names dictionary-encoded),
+# so filtering and sorting are array operations instead of a pass over the records
+# ---------------------------
+class SalesIndex:
+    def __init__(self):
+        self.count = 0
+        self.names = []  # code -> product name
+        self.codes = {}  # product name -> code
+        self.columns = {"product": np.zeros(0, dtype=np.int32)}
+        for field in NUMERIC:
+            self.columns[field] = np.zeros(0, dtype=np.int64)  # Money in integer cents
+
+    def rebuild(self, sales):
+        self.count = 0
+        self.names = []
+        self.codes = {}
+        self.columns = {field: values[:0] for field, values in self.columns.items()}
+        self.append(sales)
+
+    def sync(self, sales):
+        # New sales are appended; anything else (undo, rename) rebuilds
+        if len(sales) < self.count:
+            self.rebuild(sales)
+        elif len(sales) > self.count:
+            self.append(sales[self.count:])
+
+    def append(self, sales):
+        # Columns grow by doubling, so appending one sale at a time stays amortized O(1)
+        n = len(sales)
+        if not n:
+            return
+        needed = self.count + n
+        if needed > len(self.columns["product"]):
+            capacity = max(needed, 2 * len(self.columns["product"]), 1024)
+            for field, values in self.columns.items():
+                grown = np.zeros(capacity, dtype=values.dtype)
+                grown[:self.count] = values[:self.count]
+                self.columns[field] = grown
+        code = self.code
+        self.columns["product"][self.count:needed] = np.fromiter(
+            (code(s["product"]) for s in sales), dtype=np.int32, count=n)
+        for field in NUMERIC:
+            values = self.columns[field]
+            values[self.count:needed] = np.fromiter((s[field] for s in sales), dtype=values.dtype, count=n)
+        self.count = needed
+
+    def code(self, name):
+        if name not in self.codes:
+            self.codes[name] = len(self.names)
+            self.names.append(name)
+        return self.codes[name]
+
+    def column(self, field):
+        return self.columns[field][:self.count]
+
+    def filter(self, product_text="", first_day=None, last_day=None, min_revenue=None):
+        # Ledger positions of the matching sales, in ledger order
+        mask = np.ones(self.count, dtype=bool)
+        if product_text:
+            text = product_text.lower()
+            matching = [code for code, name in enumerate(self.names) if text in name.lower()]
+            mask &= np.isin(self.column("product"), matching)
+        if first_day is not None:
+            mask &= self.column("day") >= first_day
+        if last_day is not None:
+            mask &= self.column("day") <= last_day
+        if min_revenue is not None:
+            mask &= self.column("revenue_cents") >= min_revenue  # In cents
+        return np.flatnonzero(mask)
+
+    def sort(self, rows, column, descending=False):
+        # Reorders the given ledger positions by a table column (stable, so ties stay in ledger order)
+        if column == 0:
+            # Products sort by name: rank the (few) names once, then sort the codes by rank
+            rank = np.empty(len(self.names), dtype=np.int32)
+            rank[sorted(range(len(self.names)), key=self.names.__getitem__)] = np.arange(len(self.names))
+            keys = rank[self.column("product")[rows]]
+        elif 1 <= column <= len(NUMERIC):
+            keys = self.column(NUMERIC[column - 1])[rows]
+        else:
+            return rows
+        order = np.argsort(-keys if descending else keys, kind="stable")
+        return rows[order]
+
+
+# ---------------------------
+# SalesTableModel: a view of the filtered, sorted ledger positions. Cells are formatted only
+# when the view asks for them, i.e. for the rows on screen.
+# ---------------------------
+class SalesTableModel(QtCore.QAbstractTableModel):
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.sales_index = SalesIndex()
+        self.rows = np.zeros(0, dtype=np.int64)  # Ledger positions shown, in display order
+        self.filters = {}
+        self.sort_column = None
+        self.sort_descending = False
+        self.refresh(rebuild=True)
+
+    def refresh(self, rebuild=False):
+        # Picks up sales added since the last call (or everything after a rebuild) and reapplies filter and sort
+        if rebuild:
+            self.sales_index.rebuild(self.manager.sales)
+        else:
+            self.sales_index.sync(self.manager.sales)
+        self.apply()
+
+    def set_filter(self, **filters):
+        self.filters = filters
+        self.apply()
+
+    def apply(self):
+        self.beginResetModel()
+        rows = self.sales_index.filter(**self.filters)
+        if self.sort_column is not None:
+            rows = self.sales_index.sort(rows, self.sort_column, self.sort_descending)
+        self.rows = rows
+        self.endResetModel()
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_descending = order == QtCore.Qt.DescendingOrder
+        self.apply()
+
+    def ledger_row(self, row):
+        return int(self.rows[row])
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return COLUMNS[section]
+        return str(self.ledger_row(section) + 1)  # Ledger numbers, as referenced by voids and returns
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole or not index.isValid():
+            return None
+        position = self.ledger_row(index.row())
+        sale = self.manager.sales[position]
+        column = index.column()
+        if column == 0:
+            return sale["product"]
+        if column == 1:
+            return str(sale["quantity"])
+        if column == 2:
+            return format_cents(sale["revenue_cents"])
+        if column == 3:
+            return format_cents(sale["profit_cents"])
+        if column == 4:
+            return str(sale["day"])
+        if "ref" in sale:
+            return f"{sale['kind']} of #{sale['ref'] + 1}"
+        notes = []
+        if "txn" in sale:
+            notes.append(f"basket #{sale['txn']}")
+        if "promo" in sale:
+            notes.append(f"{sale['promo']}: {format_cents(sale['discount_cents'])} off")
+        if position in self.manager.returned:
+            notes.append(f"{self.manager.returned[position]} returned")
+        return ", ".join(notes)
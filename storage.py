@@ -0,0 +1,50 @@
+import json
+import re
+
+CHUNK_SIZE = 1 << 16  # Characters read from disk at a time when streaming
+SEPARATORS = re.compile(r"[\s,]*")
+
+
+# ---------------------------
+# Streaming readers for the JSON data files
+# ---------------------------
+def iter_json_array(source, chunk_size=CHUNK_SIZE, with_lines=False):
+    # Yields the items of a top-level JSON array one at a time, reading the file in chunks.
+    # `source` is a path or an open text file; with_lines=True yields (line number, item) pairs.
+    if isinstance(source, str):
+        with open(source, "r", encoding="utf-8") as f:
+            yield from iter_json_array(f, chunk_size, with_lines)
+        return
+    decoder = json.JSONDecoder()
+    buffer = source.read(chunk_size)
+    pos = SEPARATORS.match(buffer).end()
+    if pos == len(buffer):
+        return
+    if not buffer.startswith("[", pos):
+        raise ValueError("the file does not contain a JSON array")
+    pos += 1
+    line = 1
+    counted = 0  # Newlines in buffer[:counted] are already included in `line`
+    while True:
+        pos = SEPARATORS.match(buffer, pos).end()
+        if buffer.startswith("]", pos):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            # The next item is cut off by the end of the buffer: keep the rest and read more
+            chunk = source.read(chunk_size)
+            if not chunk:
+                error_line = line + buffer.count("\n", counted, e.pos)
+                raise ValueError(f"line {error_line}: {e.msg}") from None
+            line += buffer.count("\n", counted, pos)
+            buffer = buffer[pos:] + chunk
+            pos = counted = 0
+            continue
+        if with_lines:
+            line += buffer.count("\n", counted, pos)
+            counted = pos
+            yield line, item
+        else:
+            yield item
+        pos = end
@@ -0,0 +1,195 @@
+import contextlib
+import functools
+import os
+
+import codec
+from aggregates import SalesAggregates
+from parallel import aggregate_sales_file, default_executor
+from partitions import PartitionedSalesStore, SegmentError
+
+# Locks between processes; released by the OS when a process exits, so a crash leaves none behind
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Layout with several locations:
+#   products.json              shared product definitions (name, price, cost, thresholds)
+#   time.json                  shared business day
+#   stores/<store>/stock.json  the store's stock: product name -> quantity
+#   stores/<store>/sales/      the store's sales segments, listed in stores/<store>/sales_manifest.json
+# Each store only writes its own shard, so locations never contend for the same file.
+STORES_DIR = "stores"
+DEFINITIONS_LOCK = "products.lock"  # Held while products.json is read, merged and written
+OPEN_LOCK = "open.lock"  # Held by the process that has a store open
+
+
+class StoreInUseError(ValueError):
+    pass
+
+
+def store_dir(data_dir, store):
+    return os.path.join(data_dir, STORES_DIR, store)
+
+
+def list_stores(data_dir):
+    root = os.path.join(data_dir, STORES_DIR)
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+
+
+def load_stock(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        return codec.decode(f.read())
+
+
+def save_stock(path, stock):
+    with open(path, "wb") as f:
+        f.write(codec.encode(stock))
+
+
+# ---------------------------
+# Locks: an exclusive OS lock on the first byte of a lock file
+# ---------------------------
+def lock(f, wait=True):
+    # True once `f` is locked; with wait=False, False at once if another process holds it
+    try:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if wait else msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        if wait:
+            raise
+        return False
+
+
+def unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def definitions_lock(data_dir):
+    with open(os.path.join(data_dir, DEFINITIONS_LOCK), "a+b") as f:
+        lock(f)
+        try:
+            yield
+        finally:
+            unlock(f)
+
+
+def hold_store(location):
+    # Marks the store as open in this process until it exits; returns the held lock file, or None
+    # (with a warning) if another process already has the store open
+    f = open(os.path.join(location, OPEN_LOCK), "a+b")
+    if lock(f, wait=False):
+        return f
+    f.close()
+    print(f"Store {os.path.basename(location)} is already open in another process")
+    return None
+
+
+def merge_definitions(disk, base, local):
+    # Three-way merge of product definitions by name: `local` is this process's list, `base` (name ->
+    # definition) what it last loaded or saved, `disk` what is in products.json now. Local changes since
+    # base win; products other stores added, edited, renamed or removed meanwhile keep those changes.
+    disk_by_name = {d["name"]: d for d in disk}
+    local_names = {d["name"] for d in local}
+    merged = []
+    for definition in local:
+        name = definition["name"]
+        if base.get(name) != definition:
+            merged.append(definition)  # Added or changed here
+        elif name in disk_by_name:
+            merged.append(disk_by_name[name])  # Unchanged here; takes any edit from elsewhere
+    for definition in disk:
+        if definition["name"] not in local_names and definition["name"] not in base:
+            merged.append(definition)  # Added elsewhere
+    return merged
+
+
+# ---------------------------
+# Cross-store aggregation
+# ---------------------------
+def aggregate_store(data_dir, store, start_day=None, end_day=None):
+    # Partial result for one shard, computed in a worker process: (sales aggregates, stock).
+    # With a day range only the segments overlapping it are read.
+    location = store_dir(data_dir, store)
+    aggregates = SalesAggregates()
+    for path in PartitionedSalesStore(location, read_only=True).segment_paths(start_day, end_day):
+        aggregates.merge(aggregate_sales_file(path, start_day, end_day))
+    return aggregates, load_stock(os.path.join(location, "stock.json"))
+
+
+def aggregate_stores(data_dir, stores=None, executor=None, start_day=None, end_day=None):
+    # Aggregates every store shard on the process pool and merges them into chain-wide aggregates and stock
+    if stores is None:
+        stores = list_stores(data_dir)
+    if executor is None:
+        executor = default_executor()
+    total = SalesAggregates()
+    stock = {}
+    for aggregates, store_stock in executor.map(
+            functools.partial(aggregate_store, data_dir, start_day=start_day, end_day=end_day), stores):
+        total.merge(aggregates)
+        for name, quantity in store_stock.items():
+            stock[name] = stock.get(name, 0) + quantity
+    return total, stock
+
+
+@contextlib.contextmanager
+def other_stores_closed(data_dir, skip_store=None):
+    # Holds every other store's open lock, so none of them can be opened while their files are rewritten.
+    # Raises StoreInUseError if one is open in another process, or partitions.SegmentError if one has
+    # a segment that does not load cleanly; nothing has been changed then.
+    held = []
+    try:
+        for store in list_stores(data_dir):
+            if store == skip_store:
+                continue
+            location = store_dir(data_dir, store)
+            f = open(os.path.join(location, OPEN_LOCK), "a+b")
+            if not lock(f, wait=False):
+                f.close()
+                raise StoreInUseError(f"Store {store} is open in another window; close it and try again")
+            held.append(f)
+            PartitionedSalesStore(location).check_segments()
+        yield
+    finally:
+        for f in held:
+            unlock(f)
+            f.close()
+
+
+def rename_product(data_dir, old_name, new_name, skip_store=None):
+    # Product definitions are shared, so a rename is carried into every other store's sales and stock.
+    # Only done while all of them are closed and readable (see other_stores_closed).
+    with other_stores_closed(data_dir, skip_store):
+        for store in list_stores(data_dir):
+            if store == skip_store:
+                continue
+            location = store_dir(data_dir, store)
+            sales_store = PartitionedSalesStore(location)
+            sales, errors = sales_store.load_all()
+            if errors:
+                raise SegmentError(f"A sales segment did not load cleanly and is left as it is: {errors[0]}")
+            if any(sale["product"] == old_name for sale in sales):
+                for sale in sales:
+                    if sale["product"] == old_name:
+                        sale["product"] = new_name
+                sales_store.rewrite(sales)
+            stock_file = os.path.join(location, "stock.json")
+            stock = load_stock(stock_file)
+            if old_name in stock:
+                stock[new_name] = stock.get(new_name, 0) + stock.pop(old_name)
+                save_stock(stock_file, stock)
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory import InventoryManager  # noqa: E402
+
+
+def product(name, quantity=1000, price_cents=100, cost_cents=60, sku=""):
+    return {"name": name, "quantity": quantity, "price_cents": price_cents, "cost_cents": cost_cents,
+            "restock_threshold": 0, "lead_time": 1, "auto_restock": False, "sku": sku}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    return str(tmp_path)
+
+
+@pytest.fixture
+def manager(data_dir):
+    # An empty single-location inventory with one product
+    manager = InventoryManager(data_dir)
+    manager.add_product(product("apple"))
+    return manager
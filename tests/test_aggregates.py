@@ -0,0 +1,20 @@
+from aggregates import SalesAggregates
+
+
+def sale(name, quantity, day, **fields):
+    return dict({"product": name, "quantity": quantity, "revenue_cents": 100 * quantity,
+                 "profit_cents": 40 * quantity, "day": day}, **fields)
+
+
+def test_rename_keeps_days_of_a_product_that_nets_to_zero():
+    aggregates = SalesAggregates()
+    aggregates.add_sale(sale("apple", 1, 1))
+    later = sale("apple", 1, 2)
+    aggregates.add_sale(later)
+    aggregates.add_sale(sale("apple", -1, 3, kind="return", ref=0))
+    aggregates.remove_sale(later)  # Undone: nothing sold on balance, but days 1 and 3 still moved stock
+    assert "apple" not in aggregates.quantity_by_product
+
+    aggregates.rename_product("apple", "pear")
+    assert "apple" not in aggregates.product_by_day
+    assert aggregates.product_by_day["pear"] == {1: 1, 3: -1}
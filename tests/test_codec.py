@@ -0,0 +1,23 @@
+import pytest
+
+import codec
+
+
+def test_legacy_float_money_becomes_cents():
+    product = codec.validate({"name": "apple", "quantity": 3, "price": 0.29, "cost": 1.1}, "product")
+    assert (product["price_cents"], product["cost_cents"]) == (29, 110)
+    assert "price" not in product and "cost" not in product
+
+    sale = codec.validate({"product": "apple", "quantity": 1, "revenue": 19.99, "profit": 4}, "sale")
+    assert (sale["revenue_cents"], sale["profit_cents"]) == (1999, 400)
+    assert "revenue" not in sale and "profit" not in sale
+
+
+def test_cents_win_over_legacy_money():
+    product = codec.validate({"name": "apple", "price": 9.99, "price_cents": 1000}, "product")
+    assert product["price_cents"] == 1000
+
+
+def test_product_without_price_is_rejected():
+    with pytest.raises(codec.ValidationError):
+        codec.validate({"name": "apple", "quantity": 3}, "product")
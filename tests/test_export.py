@@ -0,0 +1,32 @@
+import csv
+import os
+
+from export import SALE_COLUMNS, export_sales
+
+
+def sales(count):
+    return [{"product": "apple", "quantity": 1, "revenue_cents": 100, "profit_cents": 40, "day": day + 1}
+            for day in range(count)]
+
+
+def test_resume_without_output_starts_over(tmp_path):
+    path = str(tmp_path / "out.csv")
+    export_sales(iter(sales(5)), path, chunk_size=2)
+    with open(path + ".progress", "w", encoding="utf-8") as f:
+        f.write('{"options": {"format": "csv", "gzip": false, "start_day": null, "end_day": null}, '
+                '"written": 4, "bytes": 60}')
+    os.remove(path)
+    assert export_sales(iter(sales(5)), path, chunk_size=2, resume=True) == 5
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == SALE_COLUMNS and len(rows) == 6
+
+
+def test_adjustments_keep_their_fields(tmp_path):
+    path = str(tmp_path / "out.csv")
+    ledger = sales(1) + [{"product": "apple", "quantity": -1, "revenue_cents": -100, "profit_cents": -40,
+                          "day": 1, "kind": "return", "ref": 0}]
+    export_sales(iter(ledger), path)
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["kind"] == "" and rows[1]["kind"] == "return" and rows[1]["ref"] == "0"
@@ -0,0 +1,86 @@
+import json
+import os
+
+import codec
+from conftest import product
+from inventory import InventoryManager
+
+
+def test_basket_lines_of_one_product_are_quoted_together(manager):
+    manager.add_product(product("pear"))
+    manager.pricing.set_rules([codec.validate({"name": "3 for 2", "type": "buy_x_get_y", "buy": 2, "free": 1,
+                                               "products": ["apple"]}, "rule")])
+    success, _ = manager.record_transaction([(0, 2), (1, 1), (0, 1)])
+    assert success
+    apples = [sale for sale in manager.sales if sale["product"] == "apple"]
+    assert [sale["quantity"] for sale in apples] == [3]
+    assert apples[0]["revenue_cents"] == 200
+    assert apples[0]["promo"] == "3 for 2"
+    assert manager.products[0]["quantity"] == 997
+
+
+def state(manager):
+    return [dict(p) for p in manager.products], manager.current_day, len(manager.sales), manager.total_revenue_cents
+
+
+def test_undo_redo_round_trip(manager):
+    manager.add_product(product("pear", price_cents=250))
+    start = state(manager)
+    manager.record_sale(0, 3)
+    manager.record_transaction([(0, 1), (1, 2)])
+    manager.edit_product(1, product("plum", quantity=998, price_cents=300))
+    manager.advance_day()
+    end = state(manager)
+
+    for _ in range(4):
+        assert manager.undo()[0]
+    assert state(manager) == start
+    assert manager.aggregates.total_revenue_cents == 0
+    assert manager.oplog.next_undo()["op"] == "add"  # Only the products' adds are left
+
+    for _ in range(4):
+        assert manager.redo()[0]
+    assert not manager.redo()[0]
+    assert state(manager) == end
+    assert manager.aggregates.quantity_by_product == {"apple": 4, "plum": 2}
+
+    rebuilt = manager.oplog.rebuild()
+    assert rebuilt["products"] == manager.products
+    assert rebuilt["current_day"] == manager.current_day
+
+
+def test_return_and_void_adjust_aggregates(manager):
+    manager.record_sale(0, 5)
+    manager.advance_day()
+    day = manager.current_day
+    assert manager.return_sale(0, 2)[0]
+    assert manager.products[0]["quantity"] == 997
+    assert manager.aggregates.total_revenue_cents == 300
+    assert manager.aggregates.quantity_by_product["apple"] == 3
+    assert manager.aggregates.product_by_day["apple"] == {1: 5, day: -2}
+
+    assert manager.return_sale(0, kind="void")[0]
+    assert manager.products[0]["quantity"] == 1000
+    assert manager.aggregates.total_revenue_cents == 0
+    assert manager.aggregates.total_profit_cents == 0
+    assert not manager.return_sale(0, 1)[0]  # Nothing left of it
+
+    assert manager.undo()[0]  # The void
+    assert manager.aggregates.total_revenue_cents == 300
+    assert manager.aggregates.product_by_day["apple"] == {1: 5, day: -2}
+    assert manager.return_sale(0, 3)[0]
+
+
+def test_legacy_float_money_is_migrated(data_dir):
+    with open(os.path.join(data_dir, "products.json"), "w") as f:
+        json.dump([{"name": "apple", "quantity": 10, "price": 0.29, "cost": 0.1}], f)
+    with open(os.path.join(data_dir, "sales.json"), "w") as f:
+        json.dump([{"product": "apple", "quantity": 3, "revenue": 0.87, "profit": 0.57, "day": 1}], f)
+
+    for _ in range(2):  # Loading again reads the migrated files
+        manager = InventoryManager(data_dir)
+        assert not manager.load_errors
+        assert (manager.products[0]["price_cents"], manager.products[0]["cost_cents"]) == (29, 10)
+        assert "price" not in manager.products[0]
+        assert manager.sales[0]["revenue_cents"] == 87
+        assert manager.aggregates.total_profit_cents == 57
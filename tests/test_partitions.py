@@ -0,0 +1,76 @@
+import gzip
+import os
+
+import pytest
+
+import columnar
+from conftest import product
+from inventory import InventoryManager
+from partitions import PartitionedSalesStore, SegmentError
+
+
+def sell_days(manager, last_day):
+    # One sale of the first product on every day up to last_day
+    for day in range(manager.current_day, last_day + 1):
+        manager.set_day(day)
+        manager.record_sale(0, 1)
+
+
+def first_segment(data_dir):
+    segment = PartitionedSalesStore(data_dir).segments[0]
+    return os.path.join(data_dir, "sales", segment["file"])
+
+
+def test_closed_segments_are_compacted(manager, data_dir):
+    sell_days(manager, 31)
+    path = first_segment(data_dir)
+    assert columnar.is_columnar(path)
+    reloaded = InventoryManager(data_dir)
+    assert len(reloaded.sales) == 31
+    assert not reloaded.load_errors
+
+
+def test_rename_leaves_corrupt_segment_on_disk(manager, data_dir):
+    sell_days(manager, 32)
+    path = first_segment(data_dir)
+    with open(path, "wb") as f:
+        f.write(b"not a segment")
+
+    reloaded = InventoryManager(data_dir)
+    assert reloaded.load_errors
+    with pytest.raises(SegmentError):
+        reloaded.edit_product(0, product("pear"))
+    assert reloaded.products[0]["name"] == "apple"
+    with open(path, "rb") as f:
+        assert f.read() == b"not a segment"
+    assert os.path.basename(path) in [s["file"] for s in PartitionedSalesStore(data_dir).segments]
+
+
+def test_zstd_segment_without_zstandard_is_kept(manager, data_dir, monkeypatch):
+    sell_days(manager, 32)
+    path = first_segment(data_dir)
+    # A segment written where zstandard is installed, opened where it is not
+    zst_path = path.split(".", 1)[0] + ".col.zst"
+    os.replace(path, zst_path)
+    store = PartitionedSalesStore(data_dir)
+    store.segments[0]["file"] = os.path.basename(zst_path)
+    store.save_manifest()
+    monkeypatch.setattr(columnar, "zstandard", None)
+
+    reloaded = InventoryManager(data_dir)
+    assert len(reloaded.sales) == 2
+    with pytest.raises(SegmentError):
+        reloaded.edit_product(0, product("pear"))
+    assert os.path.exists(zst_path)
+
+
+def test_undo_into_a_corrupt_segment_leaves_it(manager, data_dir):
+    sell_days(manager, 30)
+    manager.advance_day()
+    path = first_segment(data_dir)
+    with open(path, "wb") as f:
+        f.write(gzip.compress(b"{broken"))
+    assert manager.undo()[0]  # Back to day 30
+    manager.record_sale(0, 1)  # Would reopen the closed segment
+    with open(path, "rb") as f:
+        assert gzip.decompress(f.read()) == b"{broken"
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+import codec
+import stores
+from conftest import product
+from inventory import InventoryManager
+
+
+def saved_names(data_dir):
+    with open(os.path.join(data_dir, "products.json"), "rb") as f:
+        return [p["name"] for p in codec.decode(f.read())]
+
+
+def test_stores_adding_products_at_once_keep_both(data_dir):
+    north = InventoryManager(data_dir, store="north")
+    south = InventoryManager(data_dir, store="south")
+    north.add_product(product("tea"))
+    south.add_product(product("milk"))
+    assert sorted(saved_names(data_dir)) == ["milk", "tea"]
+
+
+def test_merge_keeps_edits_from_elsewhere():
+    base = {"tea": {"name": "tea", "price_cents": 100}, "milk": {"name": "milk", "price_cents": 80}}
+    local = [{"name": "tea", "price_cents": 120}, {"name": "milk", "price_cents": 80}]
+    disk = [{"name": "tea", "price_cents": 100}, {"name": "oat milk", "price_cents": 90},
+            {"name": "bread", "price_cents": 200}]  # milk renamed and bread added by another store
+    merged = stores.merge_definitions(disk, base, local)
+    assert merged == [{"name": "tea", "price_cents": 120}, {"name": "oat milk", "price_cents": 90},
+                      {"name": "bread", "price_cents": 200}]
+
+
+def test_rename_refused_while_another_store_is_open(data_dir):
+    north = InventoryManager(data_dir, store="north")
+    north.add_product(product("tea"))
+    north.record_sale(0, 1)
+    south = InventoryManager(data_dir, store="south")
+    with pytest.raises(stores.StoreInUseError):
+        south.edit_product(0, product("green tea"))
+    assert south.products[0]["name"] == "tea"
+    assert north.sales[0]["product"] == "tea"
+
+
+def test_rename_reaches_closed_stores(data_dir):
+    north = InventoryManager(data_dir, store="north")
+    north.add_product(product("tea"))
+    north.record_sale(0, 2)
+    north.close()
+    south = InventoryManager(data_dir, store="south")
+    south.edit_product(0, product("green tea"))
+    south.close()
+    north = InventoryManager(data_dir, store="north")
+    assert [p["name"] for p in north.products] == ["green tea"]
+    assert north.sales[0]["product"] == "green tea"
+
+
+def test_rename_refused_while_another_store_is_damaged(data_dir):
+    north = InventoryManager(data_dir, store="north")
+    north.add_product(product("tea"))
+    north.record_sale(0, 2)
+    north.close()
+    segment = os.path.join(stores.store_dir(data_dir, "north"), "sales", "d000001-000030.jsonl")
+    with open(segment, "ab") as f:
+        f.write(b"{not json\n")
+    south = InventoryManager(data_dir, store="south")
+    with pytest.raises(ValueError):
+        south.edit_product(0, product("green tea"))
+    with open(segment, "rb") as f:
+        assert f.read().endswith(b"{not json\n")
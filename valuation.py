@@ -0,0 +1,129 @@
+import numpy as np
+from PyQt5 import QtCore
+
+from forecast import daily_quantity_matrix
+from money import format_cents
+
+WINDOW = 30  # Completed days of sales behind sell-through and days of stock
+COLUMNS = ["Product", "Stock", "Value at Cost", "Retail Value", "Gross Margin %", "Sell-through %", "Days of Stock"]
+
+
+# ---------------------------
+# Valuation metrics: one vectorized pass over the catalog
+# ---------------------------
+def sold_in_window(product_by_day, names, current_day, window=WINDOW):
+    # Units sold per product over the last `window` completed days (returns net off, never below 0)
+    last_day = current_day - 1
+    first_day = max(1, last_day - window + 1)
+    matrix = daily_quantity_matrix(product_by_day, names, first_day, last_day)
+    return np.clip(matrix.sum(axis=1), 0, None), max(last_day - first_day + 1, 0)
+
+
+def valuation_columns(products, sold, days):
+    # Columns aligned with products: stock, value at cost and retail value (cents), gross margin %,
+    # sell-through % and days of stock. Missing ratios are NaN; stock that is not selling lasts inf days.
+    stock = np.fromiter((p["quantity"] for p in products), dtype=np.int64, count=len(products))
+    price = np.fromiter((p["price_cents"] for p in products), dtype=np.int64, count=len(products))
+    cost = np.fromiter((p["cost_cents"] for p in products), dtype=np.int64, count=len(products))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        margin = np.where(price > 0, (price - cost) / price * 100, np.nan)
+        sell_through = np.where(sold + stock > 0, sold / (sold + stock) * 100, np.nan)
+        daily = sold / days if days else np.zeros(len(products))
+        days_of_stock = np.where(daily > 0, stock / daily, np.where(stock > 0, np.inf, 0.0))
+    return {"stock": stock, "value_cost": stock * cost, "value_retail": stock * price, "margin": margin,
+            "sell_through": sell_through, "days_of_stock": days_of_stock}
+
+
+# ---------------------------
+# ValuationModel: the metrics as a sortable table. Sales in the window only change when the day does,
+# so they are cached per scope (which sales the aggregates cover, e.g. one store or all of them) and day;
+# stock and prices are re-read on every refresh.
+# ---------------------------
+class ValuationModel(QtCore.QAbstractTableModel):
+    FIELDS = ["stock", "value_cost", "value_retail", "margin", "sell_through", "days_of_stock"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.names = []
+        self.columns = {}
+        self.rows = np.zeros(0, dtype=np.int64)  # Product positions in display order
+        self.sort_column = None
+        self.sort_descending = False
+        self.cache_key = None
+        self.sold = np.zeros(0)
+        self.days = 0
+
+    def refresh(self, aggregates, products, current_day, scope=None):
+        names = [p["name"] for p in products]
+        key = (scope, current_day, tuple(names))
+        if key != self.cache_key:
+            self.sold, self.days = sold_in_window(aggregates.product_by_day, names, current_day)
+            self.cache_key = key
+        self.beginResetModel()
+        self.names = names
+        self.columns = valuation_columns(products, self.sold, self.days)
+        self.rows = self.sorted_rows()
+        self.endResetModel()
+
+    def totals(self):
+        # (stock value at cost, at retail), in cents
+        if not self.names:
+            return 0, 0
+        return int(self.columns["value_cost"].sum()), int(self.columns["value_retail"].sum())
+
+    def invalidate(self):
+        # Sales of past days can change without a new day only through undo/redo
+        self.cache_key = None
+
+    def sorted_rows(self):
+        rows = np.arange(len(self.names))
+        if self.sort_column is None or self.sort_column < 0 or not self.names:
+            return rows
+        if self.sort_column == 0:
+            keys = np.array([name.lower() for name in self.names], dtype=object)
+            order = sorted(rows, key=keys.__getitem__, reverse=self.sort_descending)
+            return np.asarray(order, dtype=np.int64)
+        keys = self.columns[self.FIELDS[self.sort_column - 1]].astype(float)
+        keys = np.where(np.isnan(keys), -np.inf, keys)  # Products without a value sort first
+        return np.argsort(-keys if self.sort_descending else keys, kind="stable")
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_descending = order == QtCore.Qt.DescendingOrder
+        self.beginResetModel()
+        self.rows = self.sorted_rows()
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.TextAlignmentRole and index.column() > 0:
+            return QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        row = int(self.rows[index.row()])
+        column = index.column()
+        if column == 0:
+            return self.names[row]
+        field = self.FIELDS[column - 1]
+        value = self.columns[field][row]
+        if field == "stock":
+            return str(int(value))
+        if field in ("value_cost", "value_retail"):
+            return format_cents(int(value))
+        if np.isnan(value):
+            return "-"
+        if np.isinf(value):
+            return "no sales"
+        return f"{value:.1f}"